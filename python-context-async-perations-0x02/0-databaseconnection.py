@@ -1,28 +1,41 @@
 #!/usr/bin/env python3
 """
 Handles automatic MySQL database connection management using a class-based context manager.
+
+Pass pool=True (or a dict of pool settings, or a ConnectionPool) to lease
+the connection from a pool instead of opening a new one for every block.
 """
 
 import mysql.connector
 
+from connection_pool import resolve_pool
+
 
 class DatabaseConnection:
-    def __init__(self, host, user, password, database):
+    def __init__(self, host, user, password, database, pool=None):
         self.config = {
             "host": host,
             "user": user,
-            "password": ,
-            "database": alx_db
+            "password": password,
+            "database": database
         }
+        self.pool = resolve_pool(pool, host, user, password, database)
         self.conn = None
 
     def __enter__(self):
-        self.conn = mysql.connector.connect(**self.config)
+        if self.pool:
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = mysql.connector.connect(**self.config)
         return self.conn
 
     def __exit__(self, exc_type, exc_value, traceback):
         if self.conn:
-            self.conn.close()
+            if self.pool:
+                self.pool.release(self.conn)
+            else:
+                self.conn.close()
+            self.conn = None
 
 
 if __name__ == "__main__":
@@ -39,3 +52,13 @@ if __name__ == "__main__":
         for row in results:
             print(row)
 
+    # Pooled: later blocks reuse the connection instead of reconnecting
+    for _ in range(3):
+        with DatabaseConnection(host, user, password, database,
+                                pool={"size": 2}) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            print(cursor.fetchone())
+            cursor.close()
+    print(resolve_pool(True, host, user, password, database).metrics())
+
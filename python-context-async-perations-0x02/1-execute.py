@@ -1,13 +1,25 @@
 #!/usr/bin/env python3
 """
 Reusable context manager that handles MySQL database connection and query execution.
+
+Pass pool=True (or a dict of pool settings, or a ConnectionPool) to lease
+the connection from a pool instead of opening a new one for every query.
+
+Pass stream=True to get an iterator over the rows instead of a list:
+rows are read batch_size at a time from an unbuffered cursor, so memory
+stays bounded and the first row arrives before the query has finished
+sending. The cursor lives as long as the with block; leaving the block
+with rows unread drops the connection rather than reading the rest.
 """
 
 import mysql.connector
 
+from connection_pool import resolve_pool
+
 
 class ExecuteQuery:
-    def __init__(self, host, user, password, database, query, params=None):
+    def __init__(self, host, user, password, database, query, params=None,
+                 pool=None, stream=False, batch_size=1000):
         self.config = {
             "host": host,
             "user": user,
@@ -16,23 +28,68 @@ class ExecuteQuery:
         }
         self.query = query
         self.params = params
+        self.pool = resolve_pool(pool, host, user, password, database)
+        self.stream = stream
+        self.batch_size = batch_size
         self.conn = None
         self.cursor = None
         self.results = None
 
     def __enter__(self):
-        self.conn = mysql.connector.connect(**self.config)
-        self.cursor = self.conn.cursor()
-        self.cursor.execute(self.query, self.params)
-        self.results = self.cursor.fetchall()
+        if self.pool:
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = mysql.connector.connect(**self.config)
+        try:
+            self.cursor = self.conn.cursor(buffered=False)
+            self.cursor.execute(self.query, self.params)
+            if self.stream:
+                self.results = self._stream_rows(self.cursor)
+            else:
+                self.results = self.cursor.fetchall()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
         return self.results
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+    def _stream_rows(self, cursor):
+        """Yields rows batch_size at a time while the with block is open."""
+        while True:
+            self._check_open(cursor)
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            for row in rows:
+                self._check_open(cursor)
+                yield row
 
+    def _check_open(self, cursor):
+        if self.cursor is not cursor:
+            raise RuntimeError(
+                "streamed rows can only be read inside the with block"
+            )
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        conn, cursor = self.conn, self.cursor
+        self.conn = self.cursor = None
+        if conn is None:
+            return
+        if cursor is not None and conn.unread_result:
+            # Draining the rows the block did not read could cost the
+            # rest of a large result, so the connection is dropped
+            if self.pool:
+                self.pool.discard(conn)
+            else:
+                conn.shutdown()
+            return
+        try:
+            if cursor is not None:
+                cursor.close()
+        finally:
+            if self.pool:
+                self.pool.release(conn)
+            else:
+                conn.close()
 
 if __name__ == "__main__":
     host = "localhost"
@@ -47,3 +104,15 @@ if __name__ == "__main__":
         for row in results:
             print(row)
 
+    # Streaming: rows arrive in batches instead of one big list
+    with ExecuteQuery(host, user, password, database, query, params,
+                      stream=True, batch_size=500) as rows:
+        for row in rows:
+            print(row)
+
+    # Pooled: repeated short queries skip the TCP and auth handshake
+    for age in (25, 40):
+        with ExecuteQuery(host, user, password, database, query, (age,),
+                          pool=True) as results:
+            print(len(results))
+
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compares ExecuteQuery's default fetchall mode with its streaming mode
+and with pooled connections.
+
+Reports time to first row, total time and peak Python memory for a
+large query, and queries per second for a short one. Connection
+details come from the ALX_DB_HOST, ALX_DB_USER, ALX_DB_PASSWORD and
+ALX_DB_NAME environment variables.
+
+Usage: ./bench_execute.py [big query] [batch_size] [short queries]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+ExecuteQuery = __import__('1-execute').ExecuteQuery
+
+CREDENTIALS = (
+    os.environ.get("ALX_DB_HOST", "localhost"),
+    os.environ.get("ALX_DB_USER", "root"),
+    os.environ.get("ALX_DB_PASSWORD", ""),
+    os.environ.get("ALX_DB_NAME", "alx_db"),
+)
+
+
+def measure_scan(query, **options):
+    """Returns (seconds to first row, total seconds, rows, peak bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    with ExecuteQuery(*CREDENTIALS, query, **options) as rows:
+        for _ in rows:
+            if first is None:
+                first = time.perf_counter() - start
+            count += 1
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first or total, total, count, peak
+
+
+def queries_per_second(calls, **options):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with ExecuteQuery(*CREDENTIALS, "SELECT 1", **options) as rows:
+            list(rows)
+    return calls / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    query = sys.argv[1] if len(sys.argv) > 1 else "SELECT * FROM users"
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    calls = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    for label, options in (("fetchall", {}),
+                           (f"stream({batch_size})",
+                            {"stream": True, "batch_size": batch_size})):
+        first, total, count, peak = measure_scan(query, **options)
+        print(f"{label:<14} first row {first * 1000:>8.1f} ms  "
+              f"total {total:>7.2f} s  {count} rows  "
+              f"peak {peak / 2 ** 20:>7.1f} MiB")
+
+    for label, options in (("connect per query", {}),
+                           ("pooled", {"pool": True})):
+        rate = queries_per_second(calls, **options)
+        print(f"{label:<18} {rate:>8,.0f} queries/sec")
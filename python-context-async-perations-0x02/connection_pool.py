@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Pool of reusable MySQL connections for the DatabaseConnection and
+ExecuteQuery context managers.
+
+Connections are leased instead of opened per block, and their session
+state (open transaction, user variables, temporary tables) is reset
+when they come back. Connections that come back with unread results,
+that sat idle for longer than idle_timeout seconds or that are older
+than max_lifetime seconds are closed instead of being reused.
+"""
+
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errors
+
+POOL_SIZE = 5
+IDLE_TIMEOUT = 300.0
+MAX_LIFETIME = 1800.0
+LEASE_TIMEOUT = 10.0
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of MySQL connections for one set of credentials."""
+
+    def __init__(self, config, size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT,
+                 max_lifetime=MAX_LIFETIME, lease_timeout=LEASE_TIMEOUT):
+        self.config = dict(config)
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.lease_timeout = lease_timeout
+        self.stats = {
+            "created": 0, "leased": 0, "reused": 0, "waits": 0,
+            "wait_seconds": 0.0, "idle_expired": 0, "lifetime_expired": 0,
+            "discarded": 0,
+        }
+        self._idle = []         # (connection, released_at), newest last
+        self._born = {}         # id(connection) -> created_at
+        self._in_use = 0
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.config)
+        with self._lock:
+            self._born[id(connection)] = time.monotonic()
+            self.stats["created"] += 1
+        return connection
+
+    def _close(self, connection, reason, shutdown=False):
+        with self._lock:
+            self._born.pop(id(connection), None)
+            self.stats[reason] += 1
+        try:
+            if shutdown:
+                connection.shutdown()
+            else:
+                connection.close()
+        except errors.Error:
+            pass
+
+    def _expired(self, connection, now):
+        born = self._born.get(id(connection), now)
+        return now - born >= self.max_lifetime
+
+    def _prune(self, now):
+        """Closes idle connections past idle_timeout, oldest first."""
+        stale = []
+        with self._lock:
+            while self._idle and now - self._idle[0][1] >= self.idle_timeout:
+                stale.append(self._idle.pop(0)[0])
+        for connection in stale:
+            self._close(connection, "idle_expired")
+
+    def acquire(self, timeout=None):
+        """Leases a connection, waiting up to timeout seconds for a free slot."""
+        timeout = self.lease_timeout if timeout is None else timeout
+        if not self._slots.acquire(blocking=False):
+            started = time.monotonic()
+            acquired = self._slots.acquire(timeout=timeout)
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds"] += time.monotonic() - started
+            if not acquired:
+                raise errors.PoolError(
+                    f"No connection available within {timeout}s "
+                    f"(pool size {self.size})"
+                )
+        try:
+            connection = self._take_idle()
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self.stats["leased"] += 1
+        return connection
+
+    def _take_idle(self):
+        """Returns the most recently used live idle connection, or None."""
+        now = time.monotonic()
+        self._prune(now)
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, _ = self._idle.pop()
+            if self._expired(connection, now):
+                self._close(connection, "lifetime_expired")
+                continue
+            with self._lock:
+                self.stats["reused"] += 1
+            return connection
+
+    def discard(self, connection):
+        """Drops a leased connection without reading its pending results."""
+        try:
+            self._close(connection, "discarded", shutdown=True)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def release(self, connection):
+        """Resets a connection's session state and puts it back in the pool.
+
+        A connection with unread results is discarded instead, since
+        draining them could mean reading the rest of a large result.
+        """
+        if connection.unread_result:
+            self.discard(connection)
+            return
+        now = time.monotonic()
+        try:
+            connection.reset_session()
+        except errors.Error:
+            self._close(connection, "discarded")
+        else:
+            if self._expired(connection, now):
+                self._close(connection, "lifetime_expired")
+            else:
+                with self._lock:
+                    self._idle.append((connection, now))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+        self._prune(now)
+
+    def metrics(self):
+        """Returns pool settings, counters and current idle/in-use counts."""
+        with self._lock:
+            return dict(
+                self.stats, size=self.size, idle=len(self._idle),
+                in_use=self._in_use, idle_timeout=self.idle_timeout,
+                max_lifetime=self.max_lifetime,
+            )
+
+    def close_all(self):
+        """Closes every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection, "discarded")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host, user, password, database, **settings):
+    """Returns the shared pool for these credentials, creating it on first use.
+
+    settings (size, idle_timeout, max_lifetime, lease_timeout) only
+    apply when the pool is created.
+    """
+    key = (host, user, password, database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            config = {"host": host, "user": user, "password": password,
+                      "database": database}
+            pool = _pools[key] = ConnectionPool(config, **settings)
+    return pool
+
+
+def pool_metrics():
+    """Returns metrics() of every shared pool, keyed by host/user/database."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f"{user}@{host}/{database}": pool.metrics()
+            for (host, user, _, database), pool in pools}
+
+
+def resolve_pool(pool, host, user, password, database):
+    """Turns a context manager's pool argument into a ConnectionPool or None.
+
+    pool may be None/False (no pooling), True (the shared pool for these
+    credentials), a dict of settings for the shared pool, or a pool.
+    """
+    if not pool:
+        return None
+    if isinstance(pool, ConnectionPool):
+        return pool
+    settings = pool if isinstance(pool, dict) else {}
+    return get_pool(host, user, password, database, **settings)
@@ -1,17 +1,12 @@
 import sqlite3
-import functools
-from datetime import datetime
 
-# Decorator to log SQL queries with timestamp
-def log_queries():
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            query = kwargs.get("query") or (args[0] if args else "")
-            print(f"[{datetime.now()}] Executing SQL query: {query}")
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
+from query_metrics import timed_query
+
+# Decorator to log SQL queries with latency, rows returned and errors.
+# Timings go to query_metrics.registry; log lines are written as JSON by a
+# background thread. Use bare (@log_queries) or as @log_queries(sample_rate=0.1).
+def log_queries(func=None, *, sample_rate=1.0):
+    return timed_query(func, sample_rate=sample_rate)
 
 
 @log_queries
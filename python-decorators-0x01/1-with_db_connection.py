@@ -1,16 +1,5 @@
-import sqlite3
-import functools
-
-def with_db_connection(func):
-    """Decorator to manage opening and closing a SQLite DB connection."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-    return wrapper
+# Decorator to manage opening and closing a SQLite DB connection
+from replicas import with_db_connection
 
 
 @with_db_connection
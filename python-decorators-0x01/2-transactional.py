@@ -1,28 +1,35 @@
-import sqlite3
+import inspect
 import functools
 
+from result_cache import shared_cache, tracking_writes
 # Decorator to manage database connection
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-    return wrapper
+from replicas import with_db_connection
+from write_batch import current_batch
 
 # Decorator to manage database transactions
 def transactional(func):
+    if inspect.iscoroutinefunction(func):
+        from async_db import async_transactional
+        return async_transactional(func)
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
-        try:
-            result = func(conn, *args, **kwargs)
-            conn.commit()
-            return result
-        except Exception as e:
-            conn.rollback()
-            raise e
+        # Inside a WriteBatch the call gets a savepoint; the batch commits
+        batch = current_batch(conn)
+        if batch is not None:
+            return batch.run(func, conn, *args, **kwargs)
+        with tracking_writes(conn) as written:
+            try:
+                result = func(conn, *args, **kwargs)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+        # Drop cached reads of every table this transaction changed
+        shared_cache.invalidate_tables(written)
+        return result
+    # Lets with_db_connection send this call to the primary database
+    wrapper.writes = True
     return wrapper
 
 
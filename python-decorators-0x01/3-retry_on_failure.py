@@ -1,35 +1,11 @@
-import time
-import sqlite3
-import functools
-
 # Decorator to manage database connection
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-    return wrapper
+from replicas import with_db_connection
+
+# Decorator to retry on failure: exponential backoff with full jitter, an
+# optional overall deadline, only transient errors such as "database is
+# locked", and a process-wide retry budget
+from retry import retry_on_failure
 
-# Decorator to retry on failure
-def retry_on_failure(retries=3, delay=2):
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < retries:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    attempts += 1
-                    print(f"Attempt {attempts} failed: {e}")
-                    if attempts == retries:
-                        raise
-                    time.sleep(delay)
-        return wrapper
-    return decorator
 
 @with_db_connection
 @retry_on_failure(retries=3, delay=1)
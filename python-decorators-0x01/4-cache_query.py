@@ -1,32 +1,68 @@
 import time
-import sqlite3
+import inspect
 import functools
 
-query_cache = {}
-
+from result_cache import (
+    make_key,
+    read_tables,
+    shared_async_flights,
+    shared_cache,
+    shared_flights,
+)
 # Decorator to manage DB connection
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-    return wrapper
+from replicas import with_db_connection
 
-# Decorator to cache SQL query results based on query string
+# Bounded LRU+TTL cache, invalidated by writes made through transactional
+query_cache = shared_cache
+
+# Decorator to cache SQL query results based on query string and parameters.
+# Concurrent misses on the same key wait for a single execution.
 def cache_query(func):
+    if inspect.iscoroutinefunction(func):
+        return _async_cache_query(func)
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         query = kwargs.get("query") or (args[0] if args else None)
-        if query in query_cache:
+        key = make_key(f"{func.__module__}.{func.__qualname__}", args, kwargs)
+        hit, result = query_cache.get(key)
+        if hit:
             print("Using cached result.")
-            return query_cache[query]
-        result = func(conn, *args, **kwargs)
-        query_cache[query] = result
-        print("Query result cached.")
-        return result
+            return result
+
+        def load():
+            hit, result = query_cache.get(key, count=False)
+            if hit:
+                return result
+            tables = read_tables(query)
+            version = query_cache.version(tables)
+            result = func(conn, *args, **kwargs)
+            if query_cache.set(key, result, tables, version):
+                print("Query result cached.")
+            return result
+        return shared_flights.do(key, load)
+    return wrapper
+
+
+def _async_cache_query(func):
+    @functools.wraps(func)
+    async def wrapper(conn, *args, **kwargs):
+        query = kwargs.get("query") or (args[0] if args else None)
+        key = make_key(f"{func.__module__}.{func.__qualname__}", args, kwargs)
+        hit, result = query_cache.get(key)
+        if hit:
+            return result
+
+        async def load():
+            hit, result = query_cache.get(key, count=False)
+            if hit:
+                return result
+            tables = read_tables(query)
+            version = query_cache.version(tables)
+            result = await func(conn, *args, **kwargs)
+            query_cache.set(key, result, tables, version)
+            return result
+        return await shared_async_flights.do(key, load)
     return wrapper
 
 @with_db_connection
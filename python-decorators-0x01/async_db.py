@@ -0,0 +1,171 @@
+import sqlite3
+import asyncio
+import weakref
+import functools
+import contextlib
+
+import aiosqlite
+
+from result_cache import shared_cache, written_tables
+from sqlite_pool import DEFAULT_PRAGMAS, pragma_statements
+
+
+class AsyncSQLitePool:
+    """Bounded set of reusable aiosqlite connections for one event loop.
+
+    Connections are opened lazily, configured once with pragmas and
+    handed out most-recently-used first. Each aiosqlite connection owns
+    a non-daemon worker thread, so close_all() must be awaited before
+    the loop ends; default_async_pool() arranges that automatically.
+    """
+
+    def __init__(self, database='users.db', size=5, pragmas=None, timeout=5.0):
+        self.database = database
+        self.size = size
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self.stats = {"connects": 0, "leases": 0}
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self._all = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close_all()
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.database, timeout=self.timeout)
+        try:
+            for statement in pragma_statements(self.pragmas):
+                async with conn.execute(statement):
+                    pass
+        except BaseException:
+            await conn.close()
+            raise
+        self._all.append(conn)
+        self.stats["connects"] += 1
+        return conn
+
+    async def acquire(self):
+        """Leases a connection, waiting up to timeout seconds for a free one."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise sqlite3.OperationalError(
+                f"connection pool exhausted (size {self.size})"
+            ) from None
+        self.stats["leases"] += 1
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn):
+        """Returns a connection, rolling back anything left uncommitted."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.append(conn)
+        except BaseException:
+            self._all.remove(conn)
+            await conn.close()
+            raise
+        finally:
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        """Async context manager that leases a connection for the block."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close_all(self):
+        """Closes every connection the pool has opened."""
+        conns, self._all, self._idle = self._all, [], []
+        for conn in conns:
+            await conn.close()
+
+
+_pools = weakref.WeakKeyDictionary()
+
+
+async def _close_at_shutdown(pool):
+    """Async generator the loop closes at shutdown, closing pool with it."""
+    try:
+        yield
+    finally:
+        await pool.close_all()
+
+
+async def _start(closer):
+    await closer.__anext__()
+
+
+def default_async_pool():
+    """Returns the shared users.db pool of the running event loop.
+
+    The pool is closed when the loop shuts down its async generators, as
+    asyncio.run() does, so its worker threads never keep the interpreter
+    alive. Loops driven by hand should await close_default_async_pool().
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = AsyncSQLitePool()
+        # The loop only tracks async generators weakly; the pool keeps it
+        pool.closer = _close_at_shutdown(pool)
+        pool.closer_task = loop.create_task(_start(pool.closer))
+    return pool
+
+
+async def close_default_async_pool():
+    """Closes the running loop's shared pool; await it before the loop ends."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close_all()
+
+
+def async_with_db_connection(func=None, *, pool=None):
+    """Async with_db_connection: passes a pooled aiosqlite connection.
+
+    Usable bare or with an explicit pool, like with_pooled_db_connection.
+    """
+    if func is None:
+        return functools.partial(async_with_db_connection, pool=pool)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with (pool or default_async_pool()).connection() as conn:
+            return await func(conn, *args, **kwargs)
+    return wrapper
+
+
+def async_transactional(func):
+    """Async transactional: commits on success, rolls back on error or
+    cancellation, then drops cached reads of the tables written."""
+    @functools.wraps(func)
+    async def wrapper(conn, *args, **kwargs):
+        written = set()
+        await conn.set_trace_callback(
+            lambda statement: written.update(written_tables(statement))
+        )
+        try:
+            try:
+                result = await func(conn, *args, **kwargs)
+                await conn.commit()
+            except (Exception, asyncio.CancelledError):
+                await conn.rollback()
+                raise
+        finally:
+            await conn.set_trace_callback(None)
+        shared_cache.invalidate_tables(written)
+        return result
+    return wrapper
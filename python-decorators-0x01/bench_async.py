@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the async decorator stack.
+
+Compares opening an aiosqlite connection per call (as in
+3-concurrent.py) with coroutines decorated by with_db_connection,
+retry_on_failure and log_queries, which share one pooled set of
+aiosqlite connections, at several levels of concurrency. Writes also
+go through transactional.
+
+Runs against a generated users.db in a temporary directory.
+
+Usage: ./bench_async.py [users] [calls]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+from async_db import close_default_async_pool, default_async_pool
+from bench_fixtures import create_users_db
+
+SELECT = "SELECT * FROM users WHERE id = ?"
+UPDATE = "UPDATE users SET email = ? WHERE id = ?"
+
+
+async def get_user_unpooled(user_id):
+    async with aiosqlite.connect("users.db") as db:
+        async with db.execute(SELECT, (user_id,)) as cursor:
+            return await cursor.fetchone()
+
+
+async def run(call, users, calls, concurrency):
+    """Runs calls of call(user_id) from concurrency tasks; returns calls/sec."""
+    async def worker(offset):
+        for i in range(calls // concurrency):
+            await call((offset + i * concurrency) % users + 1)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    connects = default_async_pool().stats["connects"]
+    await close_default_async_pool()
+    return calls / elapsed, connects
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    # Importing the numbered scripts runs their demos against ./users.db
+    os.chdir(tempfile.mkdtemp())
+    create_users_db("users.db", users)
+    with contextlib.redirect_stdout(io.StringIO()):
+        log_queries = __import__('0-log_queries').log_queries
+        transactional_module = __import__('2-transactional')
+        retry_on_failure = __import__('3-retry_on_failure').retry_on_failure
+    with_db_connection = transactional_module.with_db_connection
+    transactional = transactional_module.transactional
+
+    @with_db_connection
+    @retry_on_failure(retries=3, delay=0.01)
+    @log_queries(sample_rate=0)
+    async def get_user_by_id(conn, query, user_id):
+        async with conn.execute(query, (user_id,)) as cursor:
+            return await cursor.fetchone()
+
+    @with_db_connection
+    @transactional
+    @retry_on_failure(retries=3, delay=0.01)
+    @log_queries(sample_rate=0)
+    async def update_user_email(conn, query, user_id, new_email):
+        await conn.execute(query, (new_email, user_id))
+
+    benchmarks = [
+        ("select, connect per call", get_user_unpooled),
+        ("select, decorated + pool",
+         lambda user_id: get_user_by_id(query=SELECT, user_id=user_id)),
+        ("update, decorated + pool",
+         lambda user_id: update_user_email(
+             query=UPDATE, user_id=user_id,
+             new_email=f"async{user_id}@example.com")),
+    ]
+    for concurrency in (1, 16, 64):
+        for label, call in benchmarks:
+            rate, connects = asyncio.run(run(call, users, calls, concurrency))
+            print(f"{label:<26} {concurrency:>3} tasks {rate:>9,.0f} calls/sec"
+                  f"  {connects} pooled connections")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Measures get_user_by_id calls/sec with the connect-per-call
+with_db_connection decorator and with pooled SQLite connections.
+
+Runs against a generated users.db in a temporary directory.
+
+Usage: ./bench_db_connection.py [users] [calls] [threads]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_fixtures import create_users_db
+from sqlite_pool import SQLitePool, with_pooled_db_connection
+
+
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def calls_per_second(func, users, calls, threads):
+    """Calls func with cycling user ids across threads and returns calls/sec."""
+    def run(offset):
+        for i in range(calls // threads):
+            func(user_id=(offset + i) % users + 1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(run, range(threads)))
+    return calls / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    os.chdir(tempfile.mkdtemp())
+    create_users_db("users.db", users)
+    with_db_connection = __import__('1-with_db_connection').with_db_connection
+
+    shared = SQLitePool(size=threads)
+    per_thread = SQLitePool(per_thread=True)
+    cases = [
+        ("connect per call", with_db_connection(get_user_by_id)),
+        ("shared pool", with_pooled_db_connection(pool=shared)(get_user_by_id)),
+        ("per-thread pool",
+         with_pooled_db_connection(pool=per_thread)(get_user_by_id)),
+    ]
+    for label, func in cases:
+        rate = calls_per_second(func, users, calls, threads)
+        print(f"{label:<17} {rate:>12,.0f} calls/sec")
+    shared.close_all()
+    per_thread.close_all()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Measures cold-start hit rates of cache_query with and without the
+shared on-disk second tier.
+
+Each worker is a fresh process, as after a restart, that looks up the
+same set of users through cache_query. With the disk tier, workers
+after the first find most results already stored by earlier ones. A
+write through transactional between runs shows versioned invalidation:
+the next worker misses again instead of reading stale rows.
+
+Runs against a generated users.db in a temporary directory.
+
+Usage: ./bench_disk_cache.py [users] [lookups] [workers]
+"""
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from bench_fixtures import create_users_db
+
+
+def worker(directory, lookups, disk):
+    """Runs lookups cached queries in a fresh process; returns its stats."""
+    os.chdir(directory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        module = __import__('4-cache_query')
+        if disk:
+            __import__('disk_cache').attach(path="query_cache.db")
+        module.query_cache.clear()
+
+        @module.with_db_connection
+        @module.cache_query
+        def get_user_by_id(conn, query, user_id):
+            cursor = conn.cursor()
+            cursor.execute(query, (user_id,))
+            return cursor.fetchall()
+
+        start = time.perf_counter()
+        for user_id in range(1, lookups + 1):
+            get_user_by_id(query="SELECT * FROM users WHERE id = ?",
+                           user_id=user_id)
+        elapsed = time.perf_counter() - start
+    return dict(module.query_cache.stats, seconds=elapsed)
+
+
+def update_users(directory, disk):
+    """Writes to users through transactional, bumping its tier version."""
+    os.chdir(directory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if disk:
+            __import__('disk_cache').attach(path="query_cache.db")
+        __import__('2-transactional')
+
+
+def report(label, stats):
+    served = stats["hits"] + stats["tier_hits"]
+    lookups = served + stats["misses"]
+    print(f"{label:<30} hit rate {served / lookups:>6.1%}  "
+          f"({stats['tier_hits']} from disk)  {stats['seconds'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    directory = tempfile.mkdtemp()
+    create_users_db(os.path.join(directory, "users.db"), users)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for disk in (False, True):
+            tier = "disk tier" if disk else "memory only"
+            for n in range(workers):
+                stats = pool.apply(worker, (directory, lookups, disk))
+                report(f"{tier}, worker {n + 1}", stats)
+            pool.apply(update_users, (directory, disk))
+            stats = pool.apply(worker, (directory, lookups, disk))
+            report(f"{tier}, after a write", stats)
@@ -0,0 +1,20 @@
+"""
+Test data shared by the bench_*.py scripts.
+"""
+import sqlite3
+
+
+def create_users_db(path, users, unique_email=False):
+    """Creates a users table with the given number of rows."""
+    email = "email TEXT UNIQUE" if unique_email else "email TEXT"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS users "
+        f"(id INTEGER PRIMARY KEY, name TEXT, {email})"
+    )
+    conn.executemany(
+        "INSERT INTO users (id, name, email) VALUES (?, ?, ?)",
+        ((i, f"user{i}", f"user{i}@example.com") for i in range(1, users + 1))
+    )
+    conn.commit()
+    conn.close()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measures read throughput of with_db_connection as read replicas are
+added, and checks that a thread reads its own writes.
+
+Each replica pool holds two connections, so reads can only run wider
+as replicas are added. The query scans the table so SQLite, which
+releases the GIL while it works, dominates the cost of a call.
+
+Runs against a generated users.db in a temporary directory.
+
+Usage: ./bench_replicas.py [users] [calls] [threads]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_fixtures import create_users_db
+from replicas import ReplicaRouter, use_replicas
+
+
+def calls_per_second(func, calls, threads):
+    def run(offset):
+        for i in range(calls // threads):
+            func(pattern=f"%{(offset + i) % 10}@%")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(run, range(threads)))
+    return calls / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    # Importing 2-transactional runs its demo against ./users.db
+    os.chdir(tempfile.mkdtemp())
+    create_users_db("users.db", users)
+    with contextlib.redirect_stdout(io.StringIO()):
+        module = __import__('2-transactional')
+    with_db_connection = module.with_db_connection
+    transactional = module.transactional
+
+    @with_db_connection
+    def count_users_like(conn, pattern):
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM users WHERE email LIKE ?",
+                       (pattern,))
+        return cursor.fetchone()[0]
+
+    @with_db_connection
+    def get_user_email(conn, user_id):
+        cursor = conn.cursor()
+        cursor.execute("SELECT email FROM users WHERE id = ?", (user_id,))
+        return cursor.fetchone()[0]
+
+    @with_db_connection
+    @transactional
+    def update_user_email(conn, user_id, new_email):
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET email = ? WHERE id = ?",
+                       (new_email, user_id))
+
+    setups = [("connect per call", None),
+              ("primary only", ReplicaRouter(size=2))]
+    setups += [(f"{n} WAL readers", ReplicaRouter(replicas=["users.db"] * n,
+                                                 size=2)) for n in (2, 4)]
+    setups += [(f"{n} file copies", ReplicaRouter.with_copies(count=n, size=2))
+               for n in (2, 4)]
+    for label, router in setups:
+        use_replicas(router)
+        rate = calls_per_second(count_users_like, calls, threads)
+        print(f"{label:<18} {rate:>8,.0f} reads/sec")
+
+    # Read-your-writes against stale file copies
+    router = ReplicaRouter.with_copies(count=2, size=2)
+    use_replicas(router)
+    update_user_email(user_id=1, new_email="fresh@example.com")
+    own_read = get_user_email(user_id=1)
+    router.refresh()
+    after_refresh = get_user_email(user_id=1)
+    print(f"read own write: {own_read} (sticky), after refresh: "
+          f"{after_refresh} from a replica; {router.stats}")
+    use_replicas(None)
+    for _, router in setups[1:]:
+        router.close_all()
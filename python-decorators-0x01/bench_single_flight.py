@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Stress test for cache_query under a thundering herd.
+
+Many threads (and then many asyncio tasks) miss on the same cold query
+at once. Without coalescing every caller executes the query; with
+cache_query's single-flight only one does.
+
+Usage: ./bench_single_flight.py [callers] [query_ms]
+"""
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+
+def naive_cache_query(func):
+    """The original dict-based cache_query, without coalescing."""
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(conn, query):
+        if query in cache:
+            return cache[query]
+        result = func(conn, query)
+        cache[query] = result
+        return result
+    return wrapper
+
+
+def herd(func, callers):
+    """Releases callers threads at once against func and waits for them."""
+    barrier = threading.Barrier(callers)
+
+    def call():
+        barrier.wait()
+        func(None, query="SELECT * FROM users WHERE id > 0")
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def counted_query(delay, executed):
+    def slow_query(conn, query):
+        executed.append(query)
+        time.sleep(delay)
+        return [(1, "user1")]
+    return slow_query
+
+
+def counted_async_query(delay, executed):
+    async def slow_query(conn, query):
+        executed.append(query)
+        await asyncio.sleep(delay)
+        return [(1, "user1")]
+    return slow_query
+
+
+async def async_herd(func, callers):
+    await asyncio.gather(*(
+        func(None, query="SELECT * FROM users WHERE id > 0")
+        for _ in range(callers)
+    ))
+
+
+if __name__ == "__main__":
+    callers = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+
+    # Importing 4-cache_query runs its demo against ./users.db
+    os.chdir(tempfile.mkdtemp())
+    conn = sqlite3.connect("users.db")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache_query = __import__('4-cache_query').cache_query
+
+    results = []
+    executed = []
+    herd(naive_cache_query(counted_query(delay, executed)), callers)
+    results.append(("threads, no coalescing", len(executed)))
+
+    executed = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        herd(cache_query(counted_query(delay, executed)), callers)
+    results.append(("threads, single-flight", len(executed)))
+
+    executed = []
+    asyncio.run(async_herd(
+        cache_query(counted_async_query(delay, executed)), callers
+    ))
+    results.append(("asyncio, single-flight", len(executed)))
+
+    for label, count in results:
+        print(f"{label:<24} {callers} callers -> {count} executed queries")
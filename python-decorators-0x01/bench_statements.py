@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Measures the prepared statement layer: statement cache hit rates with
+connect-per-call and pooled connections, and transactional
+update_user_email one call per row versus a single executemany.
+
+Runs against a generated users.db in a temporary directory.
+
+Usage: ./bench_statements.py [users] [calls]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import statements
+from bench_fixtures import create_users_db
+from sqlite_pool import SQLitePool, with_pooled_db_connection
+from statements import StatementStats, prepared
+
+
+def with_statement_connection(func):
+    """with_db_connection, opening a StatementConnection on every call."""
+    def wrapper(*args, **kwargs):
+        conn = statements.connect('users.db')
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+def timed(label, func, calls, stats):
+    start = time.perf_counter()
+    func()
+    rate = calls / (time.perf_counter() - start)
+    snapshot = stats.snapshot()
+    print(f"{label:<32} {rate:>10,.0f} rows/sec  "
+          f"hit rate {snapshot['hit_rate']:.1%} "
+          f"({snapshot['hits']} hits, {snapshot['misses']} misses)")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    os.chdir(tempfile.mkdtemp())
+    create_users_db("users.db", users)
+    pool = SQLitePool(per_thread=True)
+    # Importing 2-transactional runs its demo against ./users.db
+    transactional = __import__('2-transactional').transactional
+
+    def get_user_by_id(conn, user_id):
+        return (user_id,)
+
+    def update_user_email(conn, user_id, new_email):
+        return (new_email, user_id)
+
+    def update_user_emails(conn, changes):
+        return [(email, user_id) for user_id, email in changes]
+
+    select = "SELECT * FROM users WHERE id = ?"
+    update = "UPDATE users SET email = ? WHERE id = ?"
+
+    stats = StatementStats()
+    lookup = with_statement_connection(prepared(select, stats=stats)(
+        get_user_by_id))
+    timed("select, connect per call",
+          lambda: [lookup(user_id=i % users + 1) for i in range(calls)],
+          calls, stats)
+
+    stats = StatementStats()
+    lookup = with_pooled_db_connection(pool=pool)(
+        prepared(select, stats=stats)(get_user_by_id))
+    timed("select, pooled",
+          lambda: [lookup(user_id=i % users + 1) for i in range(calls)],
+          calls, stats)
+
+    stats = StatementStats()
+    update_one = with_pooled_db_connection(pool=pool)(transactional(
+        prepared(update, stats=stats)(update_user_email)))
+
+    def update_each():
+        for i in range(calls):
+            update_one(user_id=i % users + 1, new_email=f"a{i}@example.com")
+    timed("update, one execute per row", update_each, calls, stats)
+
+    stats = StatementStats()
+    update_many = with_pooled_db_connection(pool=pool)(transactional(
+        prepared(update, many=True, stats=stats)(update_user_emails)))
+
+    def update_bulk():
+        update_many(changes=[(i % users + 1, f"b{i}@example.com")
+                             for i in range(calls)])
+    timed("update, executemany", update_bulk, calls, stats)
+    pool.close_all()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Measures update_user_email throughput with one transaction per call
+and with calls grouped by WriteBatch.
+
+Every 1000th update violates a UNIQUE constraint to show that a bad
+row only rolls back its own savepoint. Runs against a generated
+users.db in a temporary directory.
+
+Usage: ./bench_write_batch.py [updates] [batch_size]
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from bench_fixtures import create_users_db
+from write_batch import WriteBatch
+
+
+def run_updates(update_user_email, updates, tag):
+    """Runs updates calls and returns the number that failed."""
+    failed = 0
+    for i in range(updates):
+        user_id = i + 1
+        # Every 1000th call collides with user 1's address
+        email = "user1@example.com" if i % 1000 == 999 else \
+            f"{tag}{user_id}@example.com"
+        try:
+            update_user_email(user_id=user_id, new_email=email)
+        except sqlite3.IntegrityError:
+            failed += 1
+    return failed
+
+
+def count_updated(tag):
+    conn = sqlite3.connect("users.db")
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM users WHERE email LIKE ?", (f"{tag}%",)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    # Importing 2-transactional runs its demo against ./users.db
+    os.chdir(tempfile.mkdtemp())
+    create_users_db("users.db", updates, unique_email=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_user_email = __import__('2-transactional').update_user_email
+
+    start = time.perf_counter()
+    failed = run_updates(update_user_email, updates, "single")
+    rate = updates / (time.perf_counter() - start)
+    print(f"{'transaction per call':<22} {rate:>10,.0f} updates/sec  "
+          f"{failed} failed, {count_updated('single')} applied")
+
+    start = time.perf_counter()
+    with WriteBatch("users.db", max_calls=batch_size) as batch:
+        failed = run_updates(update_user_email, updates, "batched")
+    rate = updates / (time.perf_counter() - start)
+    print(f"{'WriteBatch(' + str(batch_size) + ')':<22} {rate:>10,.0f} "
+          f"updates/sec  {failed} failed, {count_updated('batched')} applied, "
+          f"{batch.stats['commits']} commits")
@@ -0,0 +1,178 @@
+import json
+import time
+import zlib
+import marshal
+import sqlite3
+import hashlib
+import threading
+
+# Bump whenever the stored layout or serialization changes
+FORMAT = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    format INTEGER NOT NULL,
+    deps TEXT NOT NULL,
+    expires REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires);
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+def key_digest(key):
+    """Stable 16-byte digest of a make_key() tuple."""
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+
+
+def encode(value, compress_over=1024):
+    """Serializes rows with marshal, compressing large results; None if unsupported."""
+    try:
+        data = marshal.dumps(value)
+    except ValueError:
+        return None
+    if len(data) > compress_over:
+        return b"z" + zlib.compress(data, 1)
+    return b"m" + data
+
+
+def decode(blob):
+    data = blob[1:]
+    if blob[:1] == b"z":
+        data = zlib.decompress(data)
+    return marshal.loads(data)
+
+
+class DiskCache:
+    """Second cache tier shared by every process through one SQLite file.
+
+    Entries record the version of each table they read. Invalidating a
+    table only bumps its version, so any process that later finds an
+    entry built on an older version treats it as a miss. Results that
+    marshal cannot serialize stay in the in-memory tier only.
+    """
+
+    def __init__(self, path='query_cache.db', ttl=3600.0, max_entries=100000,
+                 compress_over=1024, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compress_over = compress_over
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "writes": 0}
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def table_versions(self, tables=None):
+        """Returns {table: version} for tables, or for every known table."""
+        conn = self._conn()
+        if tables is None:
+            return dict(conn.execute("SELECT name, version FROM table_versions"))
+        tables = sorted(tables)
+        found = dict(conn.execute(
+            "SELECT name, version FROM table_versions WHERE name IN (%s)"
+            % ",".join("?" * len(tables)), tables
+        )) if tables else {}
+        return {table: found.get(table, 0) for table in tables}
+
+    def version(self, tables):
+        """Snapshot of table versions, to pass back to set()."""
+        return self.table_versions(tables)
+
+    def get(self, key):
+        """Returns (True, value, tables) for a current entry, else (False, None, None)."""
+        digest = key_digest(key)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT format, deps, expires, value FROM entries WHERE key = ?",
+            (digest,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return False, None, None
+        fmt, deps, expires, blob = row
+        deps = json.loads(deps)
+        if fmt != FORMAT or expires <= self.clock() or \
+                self.table_versions(deps) != deps:
+            conn.execute("DELETE FROM entries WHERE key = ?", (digest,))
+            self._count("stale")
+            return False, None, None
+        self._count("hits")
+        return True, decode(blob), frozenset(deps)
+
+    def set(self, key, value, tables=frozenset(), version=None):
+        """Stores value unless one of its tables was written since version."""
+        blob = encode(value, self.compress_over)
+        if blob is None:
+            return False
+        current = self.table_versions(tables)
+        if version is not None and version != current:
+            return False
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, format, deps, expires, value) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key_digest(key), FORMAT, json.dumps(current),
+             self.clock() + self.ttl, blob)
+        )
+        self._count("writes")
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 1000 == 0
+        if prune:
+            self.prune()
+        return True
+
+    def invalidate_tables(self, tables):
+        """Bumps the version of tables, outdating every entry that read them."""
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO table_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+            [(table.lower(),) for table in tables]
+        )
+
+    def prune(self):
+        """Deletes expired entries, then the soonest-expiring over max_entries."""
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (self.clock(),))
+        conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+            "ORDER BY expires DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries")
+        with self._lock:
+            for name in self.stats:
+                self.stats[name] = 0
+
+
+def attach(cache=None, path='query_cache.db', sync_interval=1.0, **kwargs):
+    """Adds a DiskCache at path as the second tier of cache (shared_cache)."""
+    if cache is None:
+        from result_cache import shared_cache as cache
+    cache.tier = DiskCache(path, **kwargs)
+    cache.sync_interval = sync_interval
+    return cache.tier
@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import random
+import atexit
+import inspect
+import logging
+import functools
+import threading
+import logging.handlers
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Normalizes a query so calls differing only in literals group together."""
+    return _SPACES.sub(" ", _LITERALS.sub("?", query or "")).strip()
+
+
+class QueryStats:
+    """Counters and latency histogram for one query fingerprint."""
+
+    __slots__ = ("calls", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "mean_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "max_ms": self.max_ms,
+            "histogram": dict(zip(map(str, BUCKETS_MS), self.buckets)),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe in-process store of per-fingerprint query statistics."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, elapsed_ms, rows=None, error=False):
+        key = fingerprint(query)
+        bucket = next(i for i, bound in enumerate(BUCKETS_MS)
+                      if elapsed_ms <= bound)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.rows += rows or 0
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.buckets[bucket] += 1
+
+    def snapshot(self):
+        """Returns {fingerprint: stats dict} for every query seen so far."""
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+registry = MetricsRegistry()
+enabled = os.environ.get("QUERY_METRICS", "1") != "0"
+
+logger = logging.getLogger("queries")
+logger.propagate = False
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats query log records as one JSON object per line."""
+
+    def format(self, record):
+        return json.dumps({
+            "ts": record.created,
+            "query": record.query,
+            "ms": round(record.elapsed_ms, 3),
+            "rows": record.rows,
+            "error": record.error,
+        })
+
+
+def start_logging(handler=None):
+    """Starts the background thread that writes queued query logs.
+
+    Decorated calls only put records on a queue; formatting and I/O
+    happen on the listener thread. Defaults to JSON lines on stderr.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+        if handler is None:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(JSONFormatter())
+        records = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.setLevel(logging.INFO)
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Flushes pending query logs and stops the listener thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        _listener = None
+
+
+def _row_count(result):
+    return len(result) if isinstance(result, (list, tuple)) else None
+
+
+def _query_arg(args, kwargs):
+    """The SQL text of a call: query=, or the first or second positional str."""
+    query = kwargs.get("query")
+    if isinstance(query, str):
+        return query
+    for arg in args[:2]:
+        if isinstance(arg, str):
+            return arg
+    return ""
+
+
+def _record(query, start, rows, error, sample_rate, metrics):
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    (metrics or registry).record(query, elapsed_ms, rows, error)
+    if sample_rate >= 1 or random.random() < sample_rate:
+        if _listener is None:
+            start_logging()
+        logger.info("query", extra={
+            "query": fingerprint(query), "elapsed_ms": elapsed_ms,
+            "rows": rows, "error": error,
+        })
+
+
+def timed_query(func=None, *, sample_rate=1.0, metrics=None):
+    """Decorator that records latency, rows and errors of the wrapped query.
+
+    Every call is recorded in the metrics registry; a sample_rate share
+    of calls is also logged through the queued logger. When metrics are
+    disabled (QUERY_METRICS=0 or query_metrics.enabled = False) the
+    wrapper only checks a flag before calling through. Coroutine
+    functions are timed until their result is awaited.
+    """
+    if func is None:
+        return functools.partial(timed_query, sample_rate=sample_rate,
+                                 metrics=metrics)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not enabled:
+                return await func(*args, **kwargs)
+            query = _query_arg(args, kwargs)
+            start = time.perf_counter()
+            rows = None
+            error = False
+            try:
+                result = await func(*args, **kwargs)
+                rows = _row_count(result)
+                return result
+            except BaseException:
+                error = True
+                raise
+            finally:
+                _record(query, start, rows, error, sample_rate, metrics)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        query = _query_arg(args, kwargs)
+        start = time.perf_counter()
+        rows = None
+        error = False
+        try:
+            result = func(*args, **kwargs)
+            rows = _row_count(result)
+            return result
+        except Exception:
+            error = True
+            raise
+        finally:
+            _record(query, start, rows, error, sample_rate, metrics)
+    return wrapper
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import inspect
+import tempfile
+import functools
+import threading
+import itertools
+
+from sqlite_pool import DEFAULT_PRAGMAS, SQLitePool
+from write_batch import current_batch
+
+# Replica connections refuse writes, so a write routed there fails loudly
+REPLICA_PRAGMAS = dict(DEFAULT_PRAGMAS, query_only="ON")
+
+
+class ReplicaRouter:
+    """Sends read-only calls to replica pools and writes to the primary.
+
+    Functions wrapped in transactional count as writes; everything else
+    is read round-robin from the replicas. Replicas are either WAL
+    readers of the primary file, which never lag, or file copies brought
+    up to date by refresh(). A thread that has written since the last
+    refresh keeps reading from the primary, so it always sees its own
+    writes.
+    """
+
+    def __init__(self, primary='users.db', replicas=(), size=5):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.live = all(os.path.abspath(path) == os.path.abspath(primary)
+                        for path in self.replicas)
+        self.primary_pool = SQLitePool(primary, size=size)
+        self.replica_pools = [SQLitePool(path, size=size,
+                                         pragmas=REPLICA_PRAGMAS)
+                              for path in self.replicas]
+        self.stats = {"writes": 0, "primary_reads": 0, "replica_reads": 0,
+                      "sticky_reads": 0, "refreshes": 0}
+        self._next = itertools.count()
+        self._generation = 0        # writes committed on the primary
+        self._synced = 0            # generation the copies were refreshed at
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def with_copies(cls, primary='users.db', count=2, directory=None, size=5):
+        """Creates count file copies of primary and routes reads to them."""
+        directory = directory or tempfile.mkdtemp(prefix="replicas-")
+        name = os.path.splitext(os.path.basename(primary))[0]
+        paths = [os.path.join(directory, f"{name}-replica{n}.db")
+                 for n in range(count)]
+        router = cls(primary, paths, size=size)
+        router.refresh()
+        return router
+
+    def pool_for(self, writes):
+        """Returns the pool a call should lease its connection from."""
+        if writes or not self.replica_pools:
+            self.stats["writes" if writes else "primary_reads"] += 1
+            return self.primary_pool
+        if not self.live and getattr(self._local, "wrote", 0) > self._synced:
+            self.stats["sticky_reads"] += 1
+            return self.primary_pool
+        self.stats["replica_reads"] += 1
+        return self.replica_pools[next(self._next) % len(self.replica_pools)]
+
+    def call(self, func, *args, **kwargs):
+        """Runs func with a connection from the pool its kind of call uses."""
+        writes = getattr(func, "writes", False)
+        with self.pool_for(writes).connection() as conn:
+            result = func(conn, *args, **kwargs)
+        if writes:
+            with self._lock:
+                self._generation += 1
+                self._local.wrote = self._generation
+        return result
+
+    def refresh(self):
+        """Copies the primary into every file replica with the backup API."""
+        if self.live:
+            return
+        generation = self._generation
+        source = sqlite3.connect(self.primary)
+        try:
+            for path in self.replicas:
+                target = sqlite3.connect(path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+        with self._lock:
+            self._synced = max(self._synced, generation)
+            self.stats["refreshes"] += 1
+
+    def close_all(self):
+        for pool in [self.primary_pool] + self.replica_pools:
+            pool.close_all()
+
+
+_router = None
+
+
+def use_replicas(router):
+    """Routes every with_db_connection call through router; None turns it off."""
+    global _router
+    previous, _router = _router, router
+    return previous
+
+
+def active_router():
+    return _router
+
+
+def with_db_connection(func):
+    """Decorator that passes a SQLite connection to users.db as conn.
+
+    Inside a WriteBatch the call shares the batch's connection, and with
+    read replicas configured it is routed by the active ReplicaRouter;
+    otherwise a connection is opened and closed around every call.
+    Coroutine functions get a pooled aiosqlite connection instead.
+    """
+    if inspect.iscoroutinefunction(func):
+        # aiosqlite is only needed once a coroutine function is decorated
+        from async_db import async_with_db_connection
+        return async_with_db_connection(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        batch = current_batch()
+        if batch is not None:
+            return func(batch.conn, *args, **kwargs)
+        router = active_router()
+        if router is not None:
+            return router.call(func, *args, **kwargs)
+        conn = sqlite3.connect('users.db')
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
@@ -0,0 +1,316 @@
+import re
+import time
+import asyncio
+import threading
+import contextlib
+from collections import OrderedDict
+
+_READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+[`"\[]?(\w+)', re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r'\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?'
+    r'|DELETE\s+FROM)\s+[`"\[]?(\w+)',
+    re.IGNORECASE
+)
+
+
+def read_tables(query):
+    """Returns the lower-cased names of the tables a query reads from."""
+    return frozenset(name.lower() for name in _READ_TABLES.findall(query or ""))
+
+
+def written_tables(statement):
+    """Returns the lower-cased names of the tables a statement writes to."""
+    return frozenset(name.lower() for name in _WRITE_TABLES.findall(statement))
+
+
+def _freeze(value):
+    """Turns lists and dicts in call arguments into hashable tuples."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def make_key(query, args=(), kwargs=None):
+    """Cache key covering the query text and every bound parameter."""
+    return (query, _freeze(args), _freeze(kwargs or {}))
+
+
+class ResultCache:
+    """Thread-safe LRU cache of query results with a TTL and table invalidation.
+
+    Each entry remembers the tables its query read. Writing to a table
+    drops every entry that depends on it, and a result computed while
+    one of its tables was being written is not stored at all.
+
+    An optional second tier (tier, e.g. a disk_cache.DiskCache shared by
+    several processes) is consulted on misses and written alongside.
+    Every sync_interval seconds the table versions of the tier are
+    checked, so writes made by other processes also drop local entries.
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0, clock=time.monotonic,
+                 tier=None, sync_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.tier = tier
+        self.sync_interval = sync_interval
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0,
+                      "expirations": 0, "invalidations": 0, "tier_hits": 0}
+        self._entries = OrderedDict()      # key -> (expires_at, tables, value)
+        self._by_table = {}                # table -> set of keys
+        self._versions = {}                # table -> write counter
+        self._tier_versions = None         # table -> last seen tier version
+        self._synced_at = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False)[0]
+
+    def get(self, key, count=True):
+        """Returns (True, value) on a fresh hit, else (False, None)."""
+        if self.tier is not None:
+            self._sync_tier()
+            hit, value = self._get_local(key, count=False)
+            if hit:
+                if count:
+                    with self._lock:
+                        self.stats["hits"] += 1
+                return hit, value
+            hit, value, tables = self.tier.get(key)
+            with self._lock:
+                if count:
+                    self.stats["tier_hits" if hit else "misses"] += 1
+                if hit:
+                    self._store(key, value, tables)
+            return hit, value
+        return self._get_local(key, count)
+
+    def _get_local(self, key, count):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._remove(key)
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                if count:
+                    self.stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if count:
+                self.stats["hits"] += 1
+            return True, entry[2]
+
+    def _local_version(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def version(self, tables):
+        """Snapshot of the write counters of tables, to pass back to set()."""
+        tables = frozenset(tables)
+        if self.tier is not None:
+            return self._local_version(tables), self.tier.version(tables)
+        return self._local_version(tables)
+
+    def set(self, key, value, tables=frozenset(), version=None):
+        """Stores value unless one of its tables was written since version."""
+        tables = frozenset(tables)
+        tier_version = None
+        if self.tier is not None and version is not None:
+            version, tier_version = version
+        with self._lock:
+            if version is not None and version != self._local_version(tables):
+                return False
+            self._store(key, value, tables)
+        if self.tier is not None:
+            self.tier.set(key, value, tables, tier_version)
+        return True
+
+    def _store(self, key, value, tables):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl, tables, value)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate_tables(self, tables):
+        """Drops every entry that read from any of tables."""
+        self._invalidate_local(tables)
+        if self.tier is not None:
+            self.tier.invalidate_tables(tables)
+
+    def _sync_tier(self):
+        """Drops local entries of tables other processes wrote to."""
+        now = self.clock()
+        with self._lock:
+            if self._synced_at is not None and \
+                    now - self._synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+        versions = self.tier.table_versions()
+        with self._lock:
+            if self._tier_versions is not None:
+                self._invalidate_local([
+                    table for table, version in versions.items()
+                    if self._tier_versions.get(table) != version
+                ])
+            self._tier_versions = versions
+
+    def _invalidate_local(self, tables):
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            for name in self.stats:
+                self.stats[name] = 0
+
+
+class _Flight:
+    """One in-progress call that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while
+    it runs block until it finishes and receive the same result, or the
+    same exception.
+    """
+
+    def __init__(self):
+        self.stats = {"executed": 0, "coalesced": 0}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Returns func(), sharing one execution among concurrent callers."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["executed"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+# Set on a flight whose leader was cancelled; its followers retry the call
+_LEADER_CANCELLED = object()
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines running on an asyncio event loop.
+
+    If the task running the call is cancelled, the callers waiting on it
+    are not: one of them starts the call again and the rest wait on it.
+    """
+
+    def __init__(self):
+        self.stats = {"executed": 0, "coalesced": 0}
+        self._flights = {}
+
+    async def do(self, key, func):
+        """Returns await func(), sharing one execution among concurrent tasks."""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        while True:
+            future = self._flights.get(flight_key)
+            if future is None:
+                break
+            self.stats["coalesced"] += 1
+            # shield: a cancelled waiter must not cancel the shared call
+            result = await asyncio.shield(future)
+            if result is not _LEADER_CANCELLED:
+                return result
+
+        future = self._flights[flight_key] = loop.create_future()
+        self.stats["executed"] += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[flight_key]
+
+
+# Shared by cache_query and transactional so writes invalidate cached reads.
+shared_cache = ResultCache()
+shared_flights = SingleFlight()
+shared_async_flights = AsyncSingleFlight()
+
+
+@contextlib.contextmanager
+def tracking_writes(conn):
+    """Collects the tables written through conn while the block runs.
+
+    Uses the connection's trace callback, replacing any callback that
+    was already installed for the duration of the block.
+    """
+    tables = set()
+
+    def trace(statement):
+        tables.update(written_tables(statement))
+
+    conn.set_trace_callback(trace)
+    try:
+        yield tables
+    finally:
+        conn.set_trace_callback(None)
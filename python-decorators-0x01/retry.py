@@ -0,0 +1,138 @@
+import time
+import random
+import sqlite3
+import asyncio
+import inspect
+import functools
+import threading
+
+TRANSIENT_MESSAGES = ("database is locked", "database table is locked",
+                      "database is busy")
+
+
+def is_retryable(error):
+    """True for SQLite errors that usually clear up if tried again later."""
+    return isinstance(error, sqlite3.OperationalError) and \
+        any(message in str(error) for message in TRANSIENT_MESSAGES)
+
+
+class RetryBudget:
+    """Process-wide cap on retries, shared by every decorated function.
+
+    Each first attempt deposits ratio tokens and each retry spends one,
+    so retries stay below roughly ratio of the call volume. A small
+    per-second allowance keeps retries possible when traffic is light.
+    While the budget is empty, failures are raised without retrying,
+    which stops retry storms from piling onto a locked database.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=10, max_tokens=100):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.stats = {"attempts": 0, "retries": 0, "denied": 0}
+        self._tokens = float(max_tokens)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.max_tokens,
+            self._tokens + (now - self._refilled) * self.min_per_second
+        )
+        self._refilled = now
+
+    def deposit(self):
+        """Records a first attempt."""
+        with self._lock:
+            self.stats["attempts"] += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Returns True if a retry may go ahead."""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.stats["denied"] += 1
+                return False
+            self._tokens -= 1
+            self.stats["retries"] += 1
+            return True
+
+
+shared_budget = RetryBudget()
+
+
+def backoff(attempt, delay, max_delay):
+    """Full-jitter exponential backoff: uniform in [0, delay * 2**attempt]."""
+    return random.uniform(0, min(max_delay, delay * 2 ** attempt))
+
+
+class _Attempts:
+    """Bookkeeping shared by the sync and async retry loops."""
+
+    def __init__(self, retries, delay, max_delay, deadline, retryable, budget):
+        self.retries = retries
+        self.delay = delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self.budget = budget
+        self.stop_at = None if deadline is None else time.monotonic() + deadline
+        self.attempt = 0
+        budget.deposit()
+
+    def next_sleep(self, error):
+        """Returns seconds to wait before retrying, or None to give up."""
+        self.attempt += 1
+        print(f"Attempt {self.attempt} failed: {error}")
+        if self.attempt >= self.retries or not self.retryable(error):
+            return None
+        sleep = backoff(self.attempt - 1, self.delay, self.max_delay)
+        if self.stop_at is not None and time.monotonic() + sleep > self.stop_at:
+            return None
+        if not self.budget.withdraw():
+            return None
+        return sleep
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30, deadline=None,
+                     retryable=is_retryable, budget=None):
+    """Decorator that retries transient failures with jittered backoff.
+
+    retries is the total number of attempts and delay the base of the
+    exponential backoff. Retrying stops early once the next sleep would
+    pass deadline seconds from the first attempt, when retryable(error)
+    is False, or when the shared retry budget runs dry. Coroutine
+    functions are retried with asyncio.sleep instead of blocking.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                attempts = _Attempts(retries, delay, max_delay, deadline,
+                                     retryable, budget or shared_budget)
+                while True:
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        sleep = attempts.next_sleep(e)
+                        if sleep is None:
+                            raise
+                    await asyncio.sleep(sleep)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attempts = _Attempts(retries, delay, max_delay, deadline,
+                                 retryable, budget or shared_budget)
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    sleep = attempts.next_sleep(e)
+                    if sleep is None:
+                        raise
+                time.sleep(sleep)
+        return wrapper
+    return decorator
@@ -0,0 +1,174 @@
+import sqlite3
+import functools
+import queue
+import weakref
+import threading
+import contextlib
+
+from statements import DEFAULT_CACHED_STATEMENTS, StatementConnection
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,       # KiB when negative, i.e. 64 MiB
+    "mmap_size": 268435456,     # 256 MiB
+}
+ALLOWED_PRAGMAS = {
+    "journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout",
+    "temp_store", "foreign_keys", "query_only",
+}
+
+
+def pragma_statements(pragmas):
+    """Validates pragmas and returns the PRAGMA statements that apply them."""
+    statements = []
+    for name, value in pragmas.items():
+        if name not in ALLOWED_PRAGMAS:
+            raise ValueError(f"Unsupported pragma: {name}")
+        if not str(value).lstrip("-").isalnum():
+            raise ValueError(f"Invalid value for pragma {name}: {value}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+class _ThreadConnection:
+    """Holds one thread's connection and closes it when the thread exits."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+        # Thread-local storage is dropped with its thread, taking this along
+        weakref.finalize(self, conn.close)
+
+
+class SQLitePool:
+    """Reusable SQLite connections, either one per thread or a bounded shared set.
+
+    Connections are opened lazily and configured once with pragmas, so
+    decorated calls skip opening the file and parsing the schema. Each
+    connection keeps up to cached_statements compiled statements.
+    """
+
+    def __init__(self, database='users.db', size=5, per_thread=False,
+                 pragmas=None, timeout=5.0,
+                 cached_statements=DEFAULT_CACHED_STATEMENTS):
+        self.database = database
+        self.size = size
+        self.per_thread = per_thread
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._all = weakref.WeakSet()   # open connections, for close_all()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, timeout=self.timeout,
+                               check_same_thread=False,
+                               factory=StatementConnection,
+                               cached_statements=self.cached_statements)
+        for statement in pragma_statements(self.pragmas):
+            conn.execute(statement)
+        with self._lock:
+            self._all.add(conn)
+        return conn
+
+    def acquire(self):
+        """Leases a connection, waiting up to timeout seconds for a free one."""
+        if self.per_thread:
+            holder = getattr(self._local, "holder", None)
+            if holder is None:
+                holder = self._local.holder = _ThreadConnection(self._connect())
+            return holder.conn
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"connection pool exhausted (size {self.size})"
+            )
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def release(self, conn):
+        """Returns a connection, rolling back anything left uncommitted.
+
+        Connections that close_all() closed while they were leased, or
+        that fail to roll back, are dropped instead of reused.
+        """
+        with self._lock:
+            current = conn in self._all
+        try:
+            if current and conn.in_transaction:
+                conn.rollback()
+        except BaseException:
+            self._discard(conn)
+            raise
+        else:
+            if current and not self.per_thread:
+                self._idle.put(conn)
+        finally:
+            if not self.per_thread:
+                self._slots.release()
+
+    def _discard(self, conn):
+        with self._lock:
+            self._all.discard(conn)
+        if self.per_thread:
+            self._local.holder = None
+        conn.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Context manager that leases a connection for the with block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Closes every connection the pool has opened."""
+        with self._lock:
+            conns, self._all = list(self._all), weakref.WeakSet()
+        for conn in conns:
+            conn.close()
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    """Returns the shared pool for users.db, creating it on first use."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = SQLitePool()
+    return _default_pool
+
+
+def with_pooled_db_connection(func=None, *, pool=None):
+    """Decorator that passes a pooled connection instead of opening a new one.
+
+    Usable bare (@with_pooled_db_connection) or with an explicit pool
+    (@with_pooled_db_connection(pool=SQLitePool(per_thread=True))).
+    """
+    if func is None:
+        return functools.partial(with_pooled_db_connection, pool=pool)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with (pool or default_pool()).connection() as conn:
+            return func(conn, *args, **kwargs)
+    return wrapper
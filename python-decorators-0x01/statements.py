@@ -0,0 +1,131 @@
+import sqlite3
+import functools
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHED_STATEMENTS = 128
+
+
+class StatementConnection(sqlite3.Connection):
+    """sqlite3 connection that remembers which statements it has compiled.
+
+    sqlite3 already keeps the last cached_statements compiled statements
+    of each connection in an LRU keyed by SQL text. compiled mirrors that
+    LRU so the statement layer can tell hits from recompilations.
+    """
+
+    def __init__(self, *args, cached_statements=DEFAULT_CACHED_STATEMENTS,
+                 **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        self.cached_statements = cached_statements
+        self.compiled = OrderedDict()
+
+
+def connect(database='users.db', cached_statements=DEFAULT_CACHED_STATEMENTS,
+            **kwargs):
+    """Opens a StatementConnection; takes the same arguments as sqlite3.connect."""
+    return sqlite3.connect(database, factory=StatementConnection,
+                           cached_statements=cached_statements, **kwargs)
+
+
+class StatementStats:
+    """Thread-safe hit/miss counters for per-connection statement caches.
+
+    Calls on plain sqlite3 connections are counted as untracked, since
+    their statement cache cannot be observed.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.untracked = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, conn, sql):
+        """Records one statement use on conn as a hit or a miss."""
+        compiled = getattr(conn, "compiled", None)
+        with self._lock:
+            if compiled is None:
+                self.untracked += 1
+            elif sql in compiled:
+                compiled.move_to_end(sql)
+                self.hits += 1
+            else:
+                compiled[sql] = None
+                if len(compiled) > conn.cached_statements:
+                    compiled.popitem(last=False)
+                self.misses += 1
+
+    def record_batch(self, rows):
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += rows
+
+    def hit_rate(self):
+        tracked = self.hits + self.misses
+        return self.hits / tracked if tracked else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "untracked": self.untracked,
+                "hit_rate": self.hit_rate(),
+                "batches": self.batches,
+                "batched_rows": self.batched_rows,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = self.untracked = 0
+            self.batches = self.batched_rows = 0
+
+
+shared_stats = StatementStats()
+
+
+def execute(conn, sql, params=(), stats=None):
+    """Runs sql once through conn's statement cache and returns the cursor."""
+    (stats or shared_stats).lookup(conn, sql)
+    return conn.execute(sql, params)
+
+
+def executemany(conn, sql, seq_of_params, stats=None):
+    """Runs sql for every parameter tuple with a single compiled statement."""
+    seq_of_params = list(seq_of_params)
+    stats = stats or shared_stats
+    stats.lookup(conn, sql)
+    stats.record_batch(len(seq_of_params))
+    return conn.executemany(sql, seq_of_params)
+
+
+def prepared(sql, *, many=False, stats=None):
+    """Decorator that runs sql with the parameters the wrapped function returns.
+
+    The wrapped function gets the connection and its own arguments and
+    returns a parameter tuple, or with many=True an iterable of them to
+    send through executemany. Queries return their rows; other
+    statements return the number of affected rows.
+
+    Usage:
+        @with_pooled_db_connection
+        @prepared("UPDATE users SET email = ? WHERE id = ?", many=True)
+        def update_user_emails(conn, changes):
+            return [(email, user_id) for user_id, email in changes]
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            params = func(conn, *args, **kwargs)
+            if many:
+                cursor = executemany(conn, sql, params, stats)
+            else:
+                cursor = execute(conn, sql, params or (), stats)
+            if cursor.description is not None:
+                return cursor.fetchall()
+            return cursor.rowcount
+        return wrapper
+    return decorator
@@ -0,0 +1,114 @@
+import time
+import sqlite3
+import threading
+
+from result_cache import shared_cache, written_tables
+
+_local = threading.local()
+
+
+def current_batch(conn=None):
+    """Returns this thread's active WriteBatch (for conn, if given), or None."""
+    batch = getattr(_local, "batch", None)
+    if batch is None or (conn is not None and batch.conn is not conn):
+        return None
+    return batch
+
+
+class WriteBatch:
+    """Groups many transactional write calls into few commits.
+
+    While the batch is active on a thread, with_db_connection hands out
+    the batch's connection and transactional runs each call inside its
+    own SAVEPOINT instead of committing. A failing call is rolled back
+    to its savepoint and re-raised, leaving the rest of the batch intact.
+    The transaction is committed every max_calls successful calls, when
+    max_delay seconds have passed since its first write (checked as
+    calls arrive), and when the batch ends. If the with block raises,
+    writes not yet committed are rolled back; earlier commits stand.
+
+    Usage:
+        with WriteBatch('users.db', max_calls=1000) as batch:
+            for user_id, email in changes:
+                update_user_email(user_id=user_id, new_email=email)
+    """
+
+    def __init__(self, database='users.db', max_calls=1000, max_delay=1.0,
+                 conn=None):
+        self.database = database
+        self.max_calls = max_calls
+        self.max_delay = max_delay
+        self.conn = conn
+        self.stats = {"calls": 0, "failed": 0, "commits": 0}
+        self._owns_conn = conn is None
+        self._pending = 0
+        self._started = None
+        self._written = set()
+
+    def __enter__(self):
+        if getattr(_local, "batch", None) is not None:
+            raise RuntimeError("a WriteBatch is already active on this thread")
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.database)
+        self.conn.set_trace_callback(self._trace)
+        _local.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.batch = None
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.conn.set_trace_callback(None)
+            if self._owns_conn:
+                self.conn.close()
+
+    def _trace(self, statement):
+        self._written.update(written_tables(statement))
+
+    def run(self, func, conn, *args, **kwargs):
+        """Runs one write call inside a savepoint of the batch transaction."""
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        if self._started is None:
+            self._started = time.monotonic()
+        conn.execute("SAVEPOINT batch_call")
+        try:
+            result = func(conn, *args, **kwargs)
+        except Exception:
+            conn.execute("ROLLBACK TO batch_call")
+            conn.execute("RELEASE batch_call")
+            self.stats["failed"] += 1
+            raise
+        conn.execute("RELEASE batch_call")
+        self.stats["calls"] += 1
+        self._pending += 1
+        if self._pending >= self.max_calls or \
+                time.monotonic() - self._started >= self.max_delay:
+            self.commit()
+        return result
+
+    def commit(self):
+        """Commits pending writes and invalidates cached reads of their tables."""
+        if self.conn.in_transaction:
+            self.conn.commit()
+            self.stats["commits"] += 1
+        self._pending = 0
+        self._started = None
+        if self._written:
+            shared_cache.invalidate_tables(self._written)
+            self._written = set()
+
+    def rollback(self):
+        """Discards pending writes; reads cached inside the batch may have
+        seen them, so their tables are still invalidated."""
+        if self.conn.in_transaction:
+            self.conn.rollback()
+        self._pending = 0
+        self._started = None
+        if self._written:
+            shared_cache.invalidate_tables(self._written)
+            self._written = set()
@@ -1,19 +1,21 @@
-import mysql.connector
+import db_pool
+from rows import converter_for
+from user_query import USER_SELECT
 
-def stream_users():
-    """Generator that yields rows from the user_data table as dictionaries."""
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",
-        database="ALX_prodev"
-    )
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data")
+def stream_users(row_factory=None):
+    """Generator that yields rows from the user_data table as dictionaries.
 
-    for row in cursor:
-        yield row
+    Pass row_factory=rows.UserRecord or rows.UserRow for compact rows.
+    """
+    connection = db_pool.get_connection()
+    cursor = connection.cursor(dictionary=row_factory is None)
+    try:
+        cursor.execute(f"SELECT {USER_SELECT} FROM user_data")
 
-    cursor.close()
-    connection.close()
+        if row_factory is None:
+            yield from cursor
+        else:
+            yield from map(converter_for(cursor, row_factory), cursor)
+    finally:
+        db_pool.close_stream(connection, cursor)
 
@@ -1,36 +1,36 @@
-import mysql.connector
+import db_pool
+from rows import converter_for
+from user_query import compile_select
 
-def stream_users_in_batches(batch_size):
-    """Generator that yields batches of users from the user_data table."""
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",
-        database="ALX_prodev"
-    )
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data")
+def stream_users_in_batches(batch_size, as_tuples=False, columns=None,
+                            filters=None, row_factory=None):
+    """Generator that yields batches of users from the user_data table.
 
-    batch = []
-    for row in cursor:
-        batch.append(row)
-        if len(batch) == batch_size:
-            yield batch
-            batch = []
-
-    if batch:
-        yield batch
-
-    cursor.close()
-    connection.close()
-    return
+    Rows are read with fetchmany on an unbuffered cursor, so only one
+    batch is held in client memory at a time. as_tuples=True yields
+    plain tuples instead of dictionaries, and row_factory=rows.UserRecord
+    or rows.UserRow yields compact rows. columns and filters, e.g.
+    [("age", ">", 25)], are compiled into the SELECT so only matching
+    rows and requested columns leave the server.
+    """
+    as_tuples = as_tuples or row_factory is not None
+    connection = db_pool.get_connection()
+    cursor = connection.cursor(dictionary=not as_tuples, buffered=False)
+    try:
+        cursor.execute(*compile_select(columns, filters))
+        convert = row_factory and converter_for(cursor, row_factory)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield list(map(convert, batch)) if convert else batch
+    finally:
+        db_pool.close_stream(connection, cursor)
 
 
 def batch_processing(batch_size):
     """Generator that yields users over age 25 from batches."""
-    for batch in stream_users_in_batches(batch_size):
-        for user in batch:
-            if user["age"] > 25:
-                yield user
+    for batch in stream_users_in_batches(
+            batch_size, filters=[("age", ">", 25)]):
+        yield from batch
     return
-
@@ -1,22 +1,90 @@
 import seed
+from prefetch import prefetch
+from rows import converter_for
+from user_query import USER_SELECT
 
-def paginate_users(page_size, offset):
+def paginate_users(page_size, offset, row_factory=None):
     """Fetch a single page of users with a limit and offset."""
     connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
+    try:
+        cursor = connection.cursor(dictionary=row_factory is None)
+        cursor.execute(f"SELECT {USER_SELECT} FROM user_data LIMIT {page_size} OFFSET {offset}")
+        rows = _fetch_page(cursor, row_factory)
+        cursor.close()
+    finally:
+        connection.close()
+    return rows
+
+
+def _fetch_page(cursor, row_factory):
+    """Fetch every row of the executed query, converted by row_factory."""
     rows = cursor.fetchall()
-    connection.close()
+    if row_factory is not None:
+        rows = list(map(converter_for(cursor, row_factory), rows))
+    return rows
+
+
+def paginate_users_after(connection, page_size, last_user_id=None,
+                         row_factory=None):
+    """Fetch the page of users that follows last_user_id in primary key order."""
+    cursor = connection.cursor(dictionary=row_factory is None)
+    if last_user_id is None:
+        cursor.execute(
+            f"SELECT {USER_SELECT} FROM user_data ORDER BY user_id LIMIT %s",
+            (page_size,)
+        )
+    else:
+        cursor.execute(
+            f"SELECT {USER_SELECT} FROM user_data WHERE user_id > %s "
+            "ORDER BY user_id LIMIT %s",
+            (last_user_id, page_size)
+        )
+    rows = _fetch_page(cursor, row_factory)
+    cursor.close()
     return rows
 
 
-def lazy_pagination(page_size):
-    """Generator that lazily fetches paginated users one page at a time."""
+def lazy_pagination(page_size, keyset=False, read_ahead=0, row_factory=None):
+    """Generator that lazily fetches paginated users one page at a time.
+
+    With keyset=True each page resumes from the last seen user_id on a
+    single connection, so deep pages cost the same as the first one.
+    read_ahead > 0 fetches up to that many pages on a background thread
+    while the current page is being consumed. row_factory=rows.UserRecord
+    or rows.UserRow yields compact rows instead of dictionaries.
+    """
+    if read_ahead:
+        pages = lazy_pagination(page_size, keyset, row_factory=row_factory)
+        yield from prefetch(pages, read_ahead)
+        return
+
+    if keyset:
+        yield from _keyset_pagination(page_size, row_factory)
+        return
+
     offset = 0
     while True:
-        page = paginate_users(page_size, offset)
+        page = paginate_users(page_size, offset, row_factory)
         if not page:
             break
         yield page
         offset += page_size
 
+
+def _keyset_pagination(page_size, row_factory=None):
+    """Walk user_data by primary key, reusing one connection for every page."""
+    connection = seed.connect_to_prodev()
+    try:
+        last_user_id = None
+        while True:
+            page = paginate_users_after(
+                connection, page_size, last_user_id, row_factory
+            )
+            if not page:
+                break
+            yield page
+            last_row = page[-1]
+            last_user_id = last_row["user_id"] if row_factory is None \
+                else last_row.user_id
+    finally:
+        connection.close()
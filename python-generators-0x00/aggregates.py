@@ -0,0 +1,176 @@
+"""
+Streaming aggregates over user_data ages.
+
+Aggregates are pushed down to MySQL when the server can compute them.
+Otherwise ages are read in fetchmany blocks into an array('d') buffer and
+reduced one block at a time, with NumPy doing the reduction when it is
+installed.
+"""
+import math
+import random
+from array import array
+
+import mysql.connector
+
+import db_pool
+import seed
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class StreamingStats:
+    """Running count, sum, mean, min, max and variance of a stream of numbers.
+
+    Variance follows Welford's method, merging whole blocks at once with
+    Chan's update. Percentiles are approximated from a fixed-size
+    reservoir sample.
+    """
+
+    def __init__(self, reservoir_size=10000, seed_value=None):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.reservoir_size = reservoir_size
+        self.reservoir = array('d')
+        self._random = random.Random(seed_value)
+
+    def add(self, value):
+        """Folds a single value into the running statistics."""
+        self.add_block(array('d', (value,)))
+
+    def add_block(self, block):
+        """Folds a block of floats (array('d') or similar) into the statistics."""
+        n = len(block)
+        if not n:
+            return
+        if numpy is not None:
+            values = numpy.asarray(block, dtype=numpy.float64)
+            block_sum = float(values.sum())
+            block_mean = block_sum / n
+            block_m2 = float(((values - block_mean) ** 2).sum())
+            block_min = float(values.min())
+            block_max = float(values.max())
+        else:
+            block_sum = math.fsum(block)
+            block_mean = block_sum / n
+            block_m2 = math.fsum((v - block_mean) ** 2 for v in block)
+            block_min = min(block)
+            block_max = max(block)
+
+        total_count = self.count + n
+        delta = block_mean - self.mean
+        self.mean += delta * n / total_count
+        self.m2 += block_m2 + delta * delta * self.count * n / total_count
+        self.total += block_sum
+        self.minimum = block_min if self.minimum is None \
+            else min(self.minimum, block_min)
+        self.maximum = block_max if self.maximum is None \
+            else max(self.maximum, block_max)
+        self._sample(block)
+        self.count = total_count
+
+    def _sample(self, block):
+        """Keeps a uniform reservoir sample of everything seen so far."""
+        seen = self.count
+        for value in block:
+            seen += 1
+            if len(self.reservoir) < self.reservoir_size:
+                self.reservoir.append(value)
+            else:
+                slot = self._random.randrange(seen)
+                if slot < self.reservoir_size:
+                    self.reservoir[slot] = value
+
+    @property
+    def variance(self):
+        """Population variance, or None for an empty stream."""
+        return self.m2 / self.count if self.count else None
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) from the reservoir sample."""
+        if not self.reservoir:
+            return None
+        ordered = sorted(self.reservoir)
+        rank = (len(ordered) - 1) * q / 100
+        low = math.floor(rank)
+        high = math.ceil(rank)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+    def as_dict(self, percentiles=()):
+        """Returns the statistics, plus any requested percentiles."""
+        stats = {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.mean if self.count else None,
+            "min": self.minimum,
+            "max": self.maximum,
+            "variance": self.variance,
+        }
+        for q in percentiles:
+            stats[f"p{q}"] = self.percentile(q)
+        return stats
+
+
+def stream_user_age_blocks(block_size=10000):
+    """Generator that yields ages from user_data as array('d') blocks."""
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute("SELECT age FROM user_data")
+        while True:
+            rows = cursor.fetchmany(block_size)
+            if not rows:
+                break
+            block = array('d')
+            block.extend(age for (age,) in rows)
+            yield block
+    finally:
+        db_pool.close_stream(connection, cursor)
+
+
+def pushdown_age_stats():
+    """Computes the age aggregates in MySQL and returns them as floats."""
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT COUNT(age), SUM(age), AVG(age), MIN(age), MAX(age),
+                   VAR_POP(age)
+            FROM user_data
+        """)
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        connection.close()
+
+    keys = ("count", "sum", "mean", "min", "max", "variance")
+    stats = {
+        key: None if value is None else float(value)
+        for key, value in zip(keys, row)
+    }
+    stats["count"] = int(row[0])
+    return stats
+
+
+def user_age_stats(percentiles=(), pushdown=True, block_size=10000):
+    """Returns count, sum, mean, min, max, variance and percentiles of ages.
+
+    Without percentiles the whole computation runs in MySQL. Percentiles,
+    or pushdown=False, stream the ages in blocks instead.
+    """
+    if pushdown and not percentiles:
+        try:
+            return pushdown_age_stats()
+        except mysql.connector.Error as err:
+            print(f"Aggregate pushdown failed ({err}), streaming ages")
+
+    stats = StreamingStats()
+    for block in stream_user_age_blocks(block_size):
+        stats.add_block(block)
+    return stats.as_dict(percentiles)
@@ -0,0 +1,158 @@
+"""
+Async generator counterparts of the user_data streams.
+
+Rows are read with aiomysql on an unbuffered server-side cursor, one
+fetchmany at a time and only when the consumer asks for more, so a slow
+consumer applies backpressure all the way to the server. Setting
+PRODEV_SQLITE_PATH reads from a SQLite copy of user_data through
+aiosqlite instead, which is handy for local runs and tests.
+
+Closing a stream drops the cursor and connection straight away, without
+draining the rest of the result set. Wrap streams that may be abandoned
+or cancelled in contextlib.aclosing so that happens immediately rather
+than when the generator is garbage collected.
+"""
+import contextlib
+import os
+
+from db_pool import DB_CONFIG
+from user_query import USER_SELECT
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+SQLITE_PATH = os.environ.get("PRODEV_SQLITE_PATH")
+
+
+class _SQLiteCursor:
+    """Gives aiosqlite cursors the row shapes aiomysql cursors return."""
+
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        self._convert = dict if dictionary else tuple
+
+    async def fetchmany(self, size):
+        return [self._convert(row) for row in await self._cursor.fetchmany(size)]
+
+    async def fetchall(self):
+        return [self._convert(row) for row in await self._cursor.fetchall()]
+
+
+class _Connection:
+    """Runs %s-style queries on either an aiomysql or aiosqlite connection."""
+
+    def __init__(self, connection, sqlite):
+        self._connection = connection
+        self._sqlite = sqlite
+
+    async def execute(self, query, params=(), dictionary=True):
+        """Executes query and returns an unbuffered cursor over its rows."""
+        if self._sqlite:
+            cursor = await self._connection.execute(
+                query.replace("%s", "?"), params
+            )
+            return _SQLiteCursor(cursor, dictionary)
+        cursor_class = aiomysql.SSDictCursor if dictionary else aiomysql.SSCursor
+        cursor = await self._connection.cursor(cursor_class)
+        await cursor.execute(query, params)
+        return cursor
+
+
+@contextlib.asynccontextmanager
+async def _connect():
+    """Yields a connection that is dropped as soon as the block exits."""
+    if SQLITE_PATH:
+        if aiosqlite is None:
+            raise ImportError("aiosqlite is required for PRODEV_SQLITE_PATH")
+        connection = await aiosqlite.connect(SQLITE_PATH)
+        connection.row_factory = aiosqlite.Row
+        try:
+            yield _Connection(connection, sqlite=True)
+        finally:
+            await connection.close()
+        return
+
+    if aiomysql is None:
+        raise ImportError("aiomysql is required for async streams")
+    connection = await aiomysql.connect(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        db=DB_CONFIG["database"],
+    )
+    try:
+        yield _Connection(connection, sqlite=False)
+    finally:
+        # Closing the socket skips draining unread rows from the server.
+        connection.close()
+
+
+async def stream_users_in_batches(batch_size, dictionary=True):
+    """Async generator that yields batches of users from user_data."""
+    async with _connect() as connection:
+        cursor = await connection.execute(
+            f"SELECT {USER_SELECT} FROM user_data", (), dictionary
+        )
+        while True:
+            batch = await cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+
+async def stream_users(batch_size=1000):
+    """Async generator that yields users from user_data one at a time."""
+    batches = stream_users_in_batches(batch_size)
+    async with contextlib.aclosing(batches):
+        async for batch in batches:
+            for row in batch:
+                yield row
+
+
+async def lazy_pagination(page_size):
+    """Async generator that yields pages of users in user_id order.
+
+    Pages are keyset queries resuming after the last seen user_id, all
+    on one connection that is held only while the walk is running.
+    """
+    async with _connect() as connection:
+        last_user_id = None
+        while True:
+            if last_user_id is None:
+                cursor = await connection.execute(
+                    f"SELECT {USER_SELECT} FROM user_data ORDER BY user_id "
+                    "LIMIT %s",
+                    (page_size,)
+                )
+            else:
+                cursor = await connection.execute(
+                    f"SELECT {USER_SELECT} FROM user_data WHERE user_id > %s "
+                    "ORDER BY user_id LIMIT %s",
+                    (last_user_id, page_size)
+                )
+            page = await cursor.fetchall()
+            if not page:
+                break
+            yield page
+            last_user_id = page[-1]["user_id"]
+
+
+async def stream_user_ages(batch_size=1000):
+    """Async generator that yields user ages one by one."""
+    async with _connect() as connection:
+        cursor = await connection.execute(
+            "SELECT age FROM user_data", (), False
+        )
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (age,) in rows:
+                yield age
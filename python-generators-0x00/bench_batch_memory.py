@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Profiles peak RSS of stream_users_in_batches as user_data grows.
+
+Each measurement runs in a fresh process so the reported peak belongs to
+that table size alone. With fetchmany on an unbuffered cursor the peak
+should stay flat as the table grows.
+
+Usage: ./bench_batch_memory.py [batch_size] [sizes...]
+"""
+import multiprocessing
+import resource
+import sys
+
+from seed import seed_synthetic_users
+
+
+def peak_rss_kb(batch_size, as_tuples):
+    """Streams the whole table and returns the process peak RSS in KiB."""
+    batch_processing = __import__('1-batch_processing')
+    rows = 0
+    for batch in batch_processing.stream_users_in_batches(
+            batch_size, as_tuples=as_tuples):
+        rows += len(batch)
+    return rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sizes = [int(size) for size in sys.argv[2:]] or [10000, 100000, 1000000]
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'rows':>10} {'dict RSS KiB':>14} {'tuple RSS KiB':>14}")
+    for size in sorted(sizes):
+        seed_synthetic_users(size)
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            rows, dict_rss = pool.apply(peak_rss_kb, (batch_size, False))
+            _, tuple_rss = pool.apply(peak_rss_kb, (batch_size, True))
+        print(f"{rows:>10} {dict_rss:>14} {tuple_rss:>14}")
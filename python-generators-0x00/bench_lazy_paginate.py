@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Compares deep-page latency of offset and keyset pagination over user_data.
+
+Usage: ./bench_lazy_paginate.py [rows] [page_size]
+"""
+import sys
+import time
+
+import seed
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+
+def page_latencies(page_size, keyset):
+    """Returns the seconds spent fetching each page of a full walk."""
+    latencies = []
+    pages = lazy_paginate.lazy_pagination(page_size, keyset=keyset)
+    while True:
+        start = time.perf_counter()
+        page = next(pages, None)
+        if page is None:
+            break
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, latencies):
+    """Prints page latency at a few depths of the walk."""
+    total = sum(latencies)
+    print(f"{label}: {len(latencies)} pages in {total:.2f}s")
+    for fraction in (0.0, 0.25, 0.5, 0.75, 1.0):
+        index = min(int(fraction * len(latencies)), len(latencies) - 1)
+        print(f"  page {index:>7}: {latencies[index] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    seed.seed_synthetic_users(rows)
+    report("offset", page_latencies(page_size, keyset=False))
+    report("keyset", page_latencies(page_size, keyset=True))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Compares throughput of the serial stream_users generator against the
+partitioned parallel scan with thread and process workers.
+
+Usage: ./bench_parallel_scan.py [rows] [parallelism]
+"""
+import sys
+import time
+
+import db_pool
+from seed import seed_synthetic_users
+from parallel_scan import parallel_stream_users
+
+stream_users = __import__('0-stream_users').stream_users
+
+
+def rows_per_second(rows):
+    """Drains a row iterator and returns (row count, rows/sec)."""
+    start = time.perf_counter()
+    count = sum(1 for _ in rows)
+    return count, count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    parallelism = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    seed_synthetic_users(rows)
+    db_pool.configure_pool(size=parallelism + 1)
+
+    runs = [
+        ("serial", stream_users),
+        ("threads unordered", lambda: parallel_stream_users(parallelism)),
+        ("threads ordered",
+         lambda: parallel_stream_users(parallelism, ordered=True)),
+        ("processes unordered",
+         lambda: parallel_stream_users(parallelism, use_processes=True)),
+    ]
+    for label, make_rows in runs:
+        count, rate = rows_per_second(make_rows())
+        print(f"{label:<20} {count:>10} rows {rate:>12,.0f} rows/sec")
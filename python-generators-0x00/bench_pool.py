@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Measures the per-page cost of lazy_pagination with and without the pool.
+
+Without pooling every page opens a new connection; with the shared pool
+the connection is opened once and reused for the rest of the walk.
+
+Usage: ./bench_pool.py [rows] [page_size]
+"""
+import sys
+import time
+
+import db_pool
+from seed import seed_synthetic_users
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+
+def per_page_ms(page_size):
+    """Walks user_data with offset pagination and returns ms per page."""
+    start = time.perf_counter()
+    pages = sum(1 for _ in lazy_paginate.lazy_pagination(page_size))
+    return pages, (time.perf_counter() - start) * 1000 / pages
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    seed_synthetic_users(rows)
+
+    db_pool.configure_pool(size=0)
+    pages, unpooled = per_page_ms(page_size)
+    print(f"connect per page: {pages} pages, {unpooled:.3f} ms/page")
+
+    pool = db_pool.configure_pool(size=1)
+    pages, pooled = per_page_ms(page_size)
+    print(f"pooled:           {pages} pages, {pooled:.3f} ms/page "
+          f"({pool.stats['created']} connection(s) opened)")
+    print(f"setup cost removed: {unpooled - pooled:.3f} ms/page")
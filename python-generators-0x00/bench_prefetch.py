@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Measures end-to-end time of lazy_pagination with a slow consumer, with
+and without read-ahead.
+
+Usage: ./bench_prefetch.py [rows] [page_size] [consumer_ms_per_page]
+"""
+import sys
+import time
+
+from seed import seed_synthetic_users
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+
+def consume(pages, delay):
+    """Simulates per-page consumer work and returns total seconds."""
+    start = time.perf_counter()
+    for _ in pages:
+        time.sleep(delay)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    delay = (float(sys.argv[3]) if len(sys.argv) > 3 else 5) / 1000
+
+    seed_synthetic_users(rows)
+    for keyset in (False, True):
+        mode = "keyset" if keyset else "offset"
+        serial = consume(
+            lazy_paginate.lazy_pagination(page_size, keyset), delay
+        )
+        ahead = consume(
+            lazy_paginate.lazy_pagination(page_size, keyset, read_ahead=2),
+            delay
+        )
+        print(f"{mode}: serial {serial:.2f}s, read-ahead {ahead:.2f}s "
+              f"({(1 - ahead / serial) * 100:.0f}% saved)")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compares per-row memory and iteration speed of dictionary rows against
+the compact UserRecord and UserRow types.
+
+Rows are built from the same tuples a MySQL cursor returns, so no
+database is needed.
+
+Usage: ./bench_rows.py [rows]
+"""
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from rows import UserRecord, UserRow, row_converter
+from user_query import USER_COLUMNS
+
+
+def raw_rows(count):
+    """Returns tuples shaped like user_data rows from the connector."""
+    return [
+        (str(uuid.uuid4()), f"user{i}", f"user{i}@example.com",
+         Decimal(18 + i % 60))
+        for i in range(count)
+    ]
+
+
+def build_dicts(raw):
+    return [dict(zip(USER_COLUMNS, values)) for values in raw]
+
+
+def build_with(row_factory):
+    def build(raw):
+        return list(map(row_converter(row_factory, USER_COLUMNS), raw))
+    return build
+
+
+def measure(build, raw, read_age):
+    """Returns (bytes per row, build seconds, iteration seconds)."""
+    start = time.perf_counter()
+    built = build(raw)
+    build_seconds = time.perf_counter() - start
+    del built
+
+    tracemalloc.start()
+    built = build(raw)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    total = 0
+    for row in built:
+        total += read_age(row)
+    iterate_seconds = time.perf_counter() - start
+    return size / len(raw), build_seconds, iterate_seconds
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    raw = raw_rows(count)
+
+    cases = [
+        ("dict", build_dicts, lambda row: row["age"]),
+        ("UserRecord", build_with(UserRecord), lambda row: row.age),
+        ("UserRow", build_with(UserRow), lambda row: row.age),
+    ]
+    print(f"{'row type':<12} {'bytes/row':>10} {'build s':>9} {'iterate s':>10}")
+    for label, build, read_age in cases:
+        per_row, build_seconds, iterate_seconds = measure(build, raw, read_age)
+        print(f"{label:<12} {per_row:>10.0f} {build_seconds:>9.3f} "
+              f"{iterate_seconds:>10.3f}")
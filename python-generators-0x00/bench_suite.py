@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the user_data access patterns.
+
+For every table size, user_data is seeded through seed.py and each
+generator is drained in a fresh process. The suite records rows/sec,
+time to first row, peak RSS and the number of MySQL connections opened,
+and prints one JSON object per run. Passing --baseline compares run
+times against an earlier results file and exits non-zero on a regression.
+
+Usage:
+    ./bench_suite.py --sizes 10000 1000000 10000000 --output results.jsonl
+    ./bench_suite.py --sizes 10000 --baseline results.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+
+import mysql.connector
+
+import db_pool
+import seed
+
+
+def _stream_users():
+    for row in __import__('0-stream_users').stream_users():
+        yield 1
+
+
+def _stream_users_in_batches():
+    module = __import__('1-batch_processing')
+    for batch in module.stream_users_in_batches(1000):
+        yield len(batch)
+
+
+def _lazy_pagination(keyset):
+    module = __import__('2-lazy_paginate')
+    for page in module.lazy_pagination(1000, keyset=keyset):
+        yield len(page)
+
+
+def _stream_user_data():
+    connection = seed.connect_to_prodev()
+    try:
+        for row in seed.stream_user_data(connection):
+            yield 1
+    finally:
+        connection.close()
+
+
+def _compute_average_age():
+    __import__('3-average_age').compute_average_age()
+    yield 0
+
+
+CASES = {
+    "stream_users": _stream_users,
+    "stream_users_in_batches": _stream_users_in_batches,
+    "lazy_pagination_offset": lambda: _lazy_pagination(False),
+    "lazy_pagination_keyset": lambda: _lazy_pagination(True),
+    "seed.stream_user_data": _stream_user_data,
+    "compute_average_age": _compute_average_age,
+}
+
+
+def run_case(name):
+    """Drains one generator and returns its timings and peak RSS."""
+    rows = 0
+    first_row = None
+    start = time.perf_counter()
+    for count in CASES[name]():
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows += count
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+        "time_to_first_row": first_row,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def connections_opened(monitor):
+    """Reads the server's running total of connection attempts."""
+    cursor = monitor.cursor()
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Connections'")
+    (_, value) = cursor.fetchone()
+    cursor.close()
+    return int(value)
+
+
+def run_suite(sizes, names):
+    """Yields one result per (table size, generator) pair."""
+    monitor = mysql.connector.connect(**db_pool.DB_CONFIG)
+    context = multiprocessing.get_context("spawn")
+    try:
+        for size in sorted(sizes):
+            seed.seed_synthetic_users(size)
+            for name in names:
+                before = connections_opened(monitor)
+                with context.Pool(1) as pool:
+                    result = pool.apply(run_case, (name,))
+                result.update({
+                    "generator": name,
+                    "table_rows": size,
+                    "connections": connections_opened(monitor) - before,
+                })
+                yield result
+    finally:
+        monitor.close()
+
+
+def regressions(results, baseline_file, tolerance):
+    """Returns results that ran more than tolerance slower than baseline."""
+    with open(baseline_file) as file:
+        baseline = {
+            (entry["generator"], entry["table_rows"]): entry
+            for entry in map(json.loads, file)
+        }
+    slower = []
+    for result in results:
+        previous = baseline.get((result["generator"], result["table_rows"]))
+        if previous and \
+                result["seconds"] > previous["seconds"] * (1 + tolerance):
+            slower.append((result, previous))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10000, 1000000, 10000000])
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES),
+                        default=list(CASES))
+    parser.add_argument("--output", help="also write results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown before failing (0.2=20%%)")
+    args = parser.parse_args()
+
+    results = []
+    for result in run_suite(args.sizes, args.only):
+        results.append(result)
+        print(json.dumps(result), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.writelines(json.dumps(result) + "\n" for result in results)
+
+    if args.baseline:
+        slower = regressions(results, args.baseline, args.tolerance)
+        for result, previous in slower:
+            print(f"REGRESSION {result['generator']} @ {result['table_rows']} "
+                  f"rows: {result['seconds']:.3f}s "
+                  f"(baseline {previous['seconds']:.3f}s)",
+                  file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Columnar export of user_data for analytics jobs.
+
+Batches from stream_users_in_batches are converted to columns and written
+incrementally, so the export never holds more than one batch in memory.
+Supported formats:
+
+- "arrow":   Arrow IPC file, readable with pyarrow.memory_map
+- "parquet": Parquet file written one row group per batch
+- "npy":     NumPy structured array, readable with numpy.load(mmap_mode="r")
+
+The file is written under a temporary name and renamed into place once
+complete, so a failed export never leaves a partial file at path.
+pyarrow and numpy are only needed for the formats that use them.
+"""
+import os
+import struct
+
+from user_query import USER_COLUMNS
+
+batch_processing = __import__('1-batch_processing')
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# user_id is a UUID; name and email are VARCHAR(255) stored as UTF-8 bytes,
+# which takes up to 4 bytes per character.
+NPY_FIELDS = (("user_id", 36), ("name", 255 * 4), ("email", 255 * 4))
+_NPY_HEADER_SIZE = 256
+
+
+def _columns(batch):
+    """Splits a batch of (user_id, name, email, age) tuples into columns."""
+    user_ids, names, emails, ages = zip(*batch)
+    return user_ids, names, emails, [float(age) for age in ages]
+
+
+def _arrow_schema():
+    return pyarrow.schema([
+        ("user_id", pyarrow.string()),
+        ("name", pyarrow.string()),
+        ("email", pyarrow.string()),
+        ("age", pyarrow.float64()),
+    ])
+
+
+def _arrow_batches(batches, schema):
+    for batch in batches:
+        yield pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(column) for column in _columns(batch)],
+            schema=schema
+        )
+
+
+def _npy_dtype():
+    return numpy.dtype(
+        [(name, f"S{width}") for name, width in NPY_FIELDS]
+        + [("age", "<f8")]
+    )
+
+
+def _npy_header(dtype, rows):
+    """Builds a fixed-size .npy v1.0 header so it can be rewritten in place."""
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        numpy.lib.format.dtype_to_descr(dtype), rows
+    )
+    header = header.ljust(_NPY_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) \
+        + header.encode("latin1")
+
+
+def _npy_records(batch, dtype):
+    """Encodes a batch as a structured array, refusing silent truncation."""
+    records = numpy.empty(len(batch), dtype=dtype)
+    for i, (user_id, name, email, age) in enumerate(batch):
+        encoded = (user_id.encode(), name.encode(), email.encode())
+        for (field, width), value in zip(NPY_FIELDS, encoded):
+            if len(value) > width:
+                raise ValueError(
+                    f"{field} of user {user_id} exceeds {width} bytes"
+                )
+        records[i] = encoded + (float(age),)
+    return records
+
+
+def _export_npy(batches, path):
+    dtype = _npy_dtype()
+    rows = 0
+    with open(path, "wb") as file:
+        file.write(_npy_header(dtype, 0))
+        for batch in batches:
+            file.write(_npy_records(batch, dtype).tobytes())
+            rows += len(batch)
+        file.seek(0)
+        file.write(_npy_header(dtype, rows))
+    return rows
+
+
+def _export_arrow(batches, path, fmt):
+    schema = _arrow_schema()
+    rows = 0
+    if fmt == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pyarrow.ipc.new_file(path, schema)
+    with writer:
+        for record_batch in _arrow_batches(batches, schema):
+            writer.write_batch(record_batch)
+            rows += record_batch.num_rows
+    return rows
+
+
+def export_users(path, fmt="arrow", batch_size=10000, filters=None):
+    """Streams user_data into a columnar file and returns the rows written."""
+    if fmt in ("arrow", "parquet") and pyarrow is None:
+        raise ImportError(f"pyarrow is required for the {fmt} format")
+    if fmt == "npy" and numpy is None:
+        raise ImportError("numpy is required for the npy format")
+    if fmt not in ("arrow", "parquet", "npy"):
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    batches = batch_processing.stream_users_in_batches(
+        batch_size, as_tuples=True, columns=USER_COLUMNS, filters=filters
+    )
+    partial = f"{path}.partial"
+    try:
+        if fmt == "npy":
+            rows = _export_npy(batches, partial)
+        else:
+            rows = _export_arrow(batches, partial, fmt)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
+    return rows
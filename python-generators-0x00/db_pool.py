@@ -0,0 +1,216 @@
+"""
+Shared pool of ALX_prodev connections for the user_data generators.
+
+Connections are leased from a bounded pool instead of being opened per
+call. Calling close() on a leased connection hands it back to the pool.
+Idle connections are pinged before reuse once they have sat longer than
+the health check interval, and a lease that cannot be satisfied within
+lease_timeout seconds raises mysql.connector.errors.PoolError.
+"""
+import os
+import queue
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errors
+
+DB_CONFIG = {
+    "host": os.environ.get("PRODEV_HOST", "localhost"),
+    "user": os.environ.get("PRODEV_USER", "root"),
+    "password": os.environ.get("PRODEV_PASSWORD", ""),
+    "database": os.environ.get("PRODEV_DATABASE", "ALX_prodev"),
+}
+POOL_SIZE = int(os.environ.get("PRODEV_POOL_SIZE", 5))
+LEASE_TIMEOUT = float(os.environ.get("PRODEV_LEASE_TIMEOUT", 10))
+HEALTH_CHECK_INTERVAL = float(os.environ.get("PRODEV_HEALTH_CHECK", 30))
+
+
+class PooledConnection:
+    """Leased connection whose close() returns it to the pool."""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        """Returns the connection to the pool; safe to call twice."""
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+    def discard(self):
+        """Drops the connection instead of returning it; safe to call twice."""
+        if self._connection is not None:
+            self._pool.discard(self._connection)
+            self._connection = None
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of MySQL connections."""
+
+    def __init__(self, size=POOL_SIZE, lease_timeout=LEASE_TIMEOUT,
+                 health_check_interval=HEALTH_CHECK_INTERVAL, **config):
+        self.size = size
+        self.lease_timeout = lease_timeout
+        self.health_check_interval = health_check_interval
+        self.config = config or DB_CONFIG
+        self.stats = {"created": 0, "leased": 0, "reused": 0, "discarded": 0}
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.config)
+        self._count("created")
+        return connection
+
+    def _healthy(self, connection):
+        """Pings the server, reconnecting once if the socket went away."""
+        try:
+            connection.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except errors.Error:
+            return False
+
+    def acquire(self, timeout=None):
+        """Leases a connection, waiting up to timeout seconds for a free slot."""
+        timeout = self.lease_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise errors.PoolError(
+                f"No connection available within {timeout}s "
+                f"(pool size {self.size})"
+            )
+        try:
+            connection = self._take_idle()
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        self._count("leased")
+        return PooledConnection(self, connection)
+
+    def _take_idle(self):
+        """Returns a healthy idle connection, or None if there is none."""
+        while True:
+            try:
+                connection, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            idle_for = time.monotonic() - released_at
+            if idle_for < self.health_check_interval or \
+                    self._healthy(connection):
+                self._count("reused")
+                return connection
+            self._discard(connection)
+
+    def _discard(self, connection):
+        self._count("discarded")
+        try:
+            connection.close()
+        except errors.Error:
+            pass
+
+    def discard(self, connection):
+        """Shuts a leased connection down and frees its slot."""
+        self._count("discarded")
+        try:
+            shutdown(connection)
+        finally:
+            self._slots.release()
+
+    def release(self, connection):
+        """Resets a connection's session state and puts it back in the pool.
+
+        A connection with rows still unread is discarded instead, since
+        draining them could mean reading the rest of a whole table.
+        """
+        if connection.unread_result:
+            self.discard(connection)
+            return
+        try:
+            connection.rollback()
+        except errors.Error:
+            self._discard(connection)
+        else:
+            self._idle.put((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+
+_pool = None  # None until first use, False when pooling is disabled
+_pool_lock = threading.Lock()
+
+
+def configure_pool(size=POOL_SIZE, lease_timeout=LEASE_TIMEOUT,
+                   health_check_interval=HEALTH_CHECK_INTERVAL, **config):
+    """Replaces the shared pool; size=0 disables pooling altogether."""
+    global _pool
+    with _pool_lock:
+        if _pool:
+            _pool.close_all()
+        _pool = ConnectionPool(size, lease_timeout, health_check_interval,
+                               **config) if size else False
+    return _pool
+
+
+def get_pool():
+    """Returns the shared pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def get_connection(timeout=None):
+    """Leases an ALX_prodev connection from the shared pool."""
+    pool = get_pool()
+    if not pool:
+        return mysql.connector.connect(**DB_CONFIG)
+    return pool.acquire(timeout)
+
+
+def shutdown(connection):
+    """Drops a connection's socket without reading its pending results."""
+    try:
+        connection.shutdown()
+    except errors.Error:
+        pass
+
+
+def close_stream(connection, cursor):
+    """Closes an unbuffered cursor and then returns or closes its connection.
+
+    A consumer that stops early leaves rows unread. Closing the cursor
+    would then raise "Unread result found", and draining the rest could
+    mean reading the whole table, so the connection is discarded instead.
+    """
+    if connection.unread_result:
+        if isinstance(connection, PooledConnection):
+            connection.discard()
+        else:
+            shutdown(connection)
+        return
+    try:
+        cursor.close()
+    finally:
+        connection.close()
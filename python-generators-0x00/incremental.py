@@ -0,0 +1,79 @@
+"""
+Incremental streaming of user_data rows changed since the last run.
+
+Every row carries an updated_at timestamp maintained by MySQL. The last
+(updated_at, user_id) pair a consumer finished with is persisted as a
+watermark, and the next run only reads rows past it. The watermark is
+saved after each batch has been fully consumed, so a run that stops
+early replays the unfinished batch next time (at-least-once delivery).
+
+Rows changed within the last settle_seconds are left for the next run,
+so a transaction that commits slightly after its timestamp is not
+skipped. Deleted rows are not reported.
+"""
+import json
+import os
+from datetime import datetime
+
+import db_pool
+
+WATERMARK_FILE = os.environ.get("PRODEV_WATERMARK_FILE", "user_data.watermark")
+
+
+def load_watermark(path=WATERMARK_FILE):
+    """Returns the saved (updated_at, user_id) pair, or None on a first run."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        saved = json.load(file)
+    return datetime.fromisoformat(saved["updated_at"]), saved["user_id"]
+
+
+def save_watermark(watermark, path=WATERMARK_FILE):
+    """Atomically records the last (updated_at, user_id) pair consumed."""
+    updated_at, user_id = watermark
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump({"updated_at": updated_at.isoformat(), "user_id": user_id},
+                  file)
+    os.replace(tmp_path, path)
+
+
+def stream_changed_users(watermark_file=WATERMARK_FILE, batch_size=1000,
+                         settle_seconds=1):
+    """Generator that yields users added or changed since the saved watermark."""
+    watermark = load_watermark(watermark_file)
+    connection = db_pool.get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT NOW(6) - INTERVAL %s MICROSECOND AS upper_bound",
+            (int(settle_seconds * 1000000),)
+        )
+        upper_bound = cursor.fetchone()["upper_bound"]
+
+        while True:
+            if watermark is None:
+                cursor.execute("""
+                    SELECT * FROM user_data WHERE updated_at <= %s
+                    ORDER BY updated_at, user_id LIMIT %s
+                """, (upper_bound, batch_size))
+            else:
+                updated_at, user_id = watermark
+                cursor.execute("""
+                    SELECT * FROM user_data
+                    WHERE updated_at <= %s
+                    AND (updated_at > %s OR (updated_at = %s AND user_id > %s))
+                    ORDER BY updated_at, user_id LIMIT %s
+                """, (upper_bound, updated_at, updated_at, user_id,
+                      batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            yield from rows
+            watermark = (rows[-1]["updated_at"], rows[-1]["user_id"])
+            save_watermark(watermark, watermark_file)
+    finally:
+        cursor.close()
+        connection.close()
@@ -0,0 +1,109 @@
+"""
+Partitioned parallel scan of user_data.
+
+The table is split into user_id key ranges of roughly equal size. Each
+range is read on its own connection by a thread or process pool, and the
+rows are merged back either in key order or as soon as a range is done.
+"""
+import collections
+import multiprocessing
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+
+import db_pool
+from user_query import compile_select
+
+
+def partition_bounds(partitions):
+    """Splits user_data into key ranges as (low, high) pairs.
+
+    low is inclusive and high exclusive; None leaves a side open. The
+    split points are read from the primary key index, so every range
+    holds about the same number of rows.
+    """
+    connection = db_pool.get_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM user_data")
+        (count,) = cursor.fetchone()
+        split_points = []
+        for i in range(1, partitions):
+            cursor.execute(
+                "SELECT user_id FROM user_data ORDER BY user_id "
+                "LIMIT 1 OFFSET %s",
+                (count * i // partitions,)
+            )
+            row = cursor.fetchone()
+            if row and (not split_points or row[0] > split_points[-1]):
+                split_points.append(row[0])
+    finally:
+        cursor.close()
+        connection.close()
+
+    edges = [None] + split_points + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def scan_range(bounds, columns=None):
+    """Returns the rows of user_data whose user_id falls within bounds."""
+    low, high = bounds
+    filters = []
+    if low is not None:
+        filters.append(("user_id", ">=", low))
+    if high is not None:
+        filters.append(("user_id", "<", high))
+
+    connection = db_pool.get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(*compile_select(columns, filters, order_by="user_id"))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def parallel_stream_users(parallelism=4, ordered=False, use_processes=False,
+                          partitions_per_worker=4, columns=None):
+    """Generator that yields user_data rows read by parallel range scans.
+
+    ordered=True yields rows in user_id order; otherwise each range is
+    yielded as soon as it completes. Each worker gets several small
+    ranges and at most two per worker are in flight, which bounds the
+    rows buffered at once. Process workers are spawned fresh so they
+    never share the parent's sockets; thread workers lease from the
+    shared pool, so PRODEV_POOL_SIZE should be at least parallelism.
+    """
+    bounds = partition_bounds(parallelism * partitions_per_worker)
+    if use_processes:
+        executor = ProcessPoolExecutor(
+            parallelism, mp_context=multiprocessing.get_context("spawn")
+        )
+    else:
+        executor = ThreadPoolExecutor(parallelism)
+
+    max_in_flight = parallelism * 2
+    with executor:
+        if ordered:
+            futures = collections.deque()
+            for bound in bounds:
+                futures.append(executor.submit(scan_range, bound, columns))
+                if len(futures) >= max_in_flight:
+                    yield from futures.popleft().result()
+            while futures:
+                yield from futures.popleft().result()
+        else:
+            futures = set()
+            for bound in bounds:
+                futures.add(executor.submit(scan_range, bound, columns))
+                if len(futures) >= max_in_flight:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            for future in as_completed(futures):
+                yield from future.result()
@@ -0,0 +1,58 @@
+"""
+Read-ahead wrapper that overlaps database round trips with consumer work.
+"""
+import queue
+import threading
+
+_DONE = object()
+
+
+def prefetch(iterable, depth=1):
+    """Generator that yields items of iterable, fetched ahead on a thread.
+
+    A background thread keeps up to depth items ready in a bounded queue,
+    so item N+1 is fetched while item N is being processed. Errors raised
+    by the source are re-raised to the consumer. Closing this generator
+    stops the thread and closes the source, releasing its connection.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def offer(item):
+        """Blocks until the item is queued, giving up once stop is set."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        source = iter(iterable)
+        try:
+            for item in source:
+                if not offer((item, None)):
+                    break
+            else:
+                offer((_DONE, None))
+        except Exception as err:
+            offer((_DONE, err))
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, err = items.get()
+            if err is not None:
+                raise err
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
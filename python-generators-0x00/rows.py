@@ -0,0 +1,85 @@
+"""
+Compact row types for streamed user_data records.
+
+Dictionary cursors build a fresh dict with string keys and a Decimal age
+for every row. Passing row_factory=UserRecord (a __slots__ class) or
+row_factory=UserRow (a namedtuple) to the generators yields much smaller
+rows instead, with age converted to int (or float for fractional ages).
+"""
+from collections import namedtuple
+
+from user_query import USER_COLUMNS
+
+
+class UserRecord:
+    """user_data row stored in __slots__ rather than an instance dict."""
+
+    __slots__ = USER_COLUMNS
+
+    def __init__(self, user_id=None, name=None, email=None, age=None):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}"
+                           for name in self.__slots__)
+        return f"UserRecord({fields})"
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def _astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def _asdict(self):
+        return dict(zip(self.__slots__, self._astuple()))
+
+
+UserRow = namedtuple("UserRow", USER_COLUMNS,
+                     defaults=(None,) * len(USER_COLUMNS))
+
+
+def to_number(age):
+    """Converts a DECIMAL age to int, or float when it has a fraction."""
+    if age is None:
+        return None
+    whole = int(age)
+    return whole if whole == age else float(age)
+
+
+def row_converter(row_factory, column_names):
+    """Returns a function turning a tuple row into a row_factory instance."""
+    column_names = tuple(column_names)
+    fields = getattr(row_factory, "_fields", None) or \
+        getattr(row_factory, "__slots__", None)
+    if fields is not None:
+        unknown = [name for name in column_names if name not in fields]
+        if unknown:
+            raise ValueError(
+                f"{row_factory.__name__} has no field for column(s): "
+                f"{', '.join(unknown)}"
+            )
+    age_index = column_names.index("age") if "age" in column_names else None
+
+    if column_names == USER_COLUMNS[:len(column_names)]:
+        build = row_factory
+    else:
+        def build(*values):
+            return row_factory(**dict(zip(column_names, values)))
+
+    if age_index is None:
+        return lambda values: build(*values)
+
+    def convert(values):
+        return build(*values[:age_index], to_number(values[age_index]),
+                     *values[age_index + 1:])
+    return convert
+
+
+def converter_for(cursor, row_factory):
+    """Returns a converter for rows of an executed tuple cursor."""
+    return row_converter(row_factory, cursor.column_names)
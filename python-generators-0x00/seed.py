@@ -1,8 +1,16 @@
 import mysql.connector
 import csv
+import json
+import itertools
+import os
+import time
 import uuid
 from decimal import Decimal
 
+import db_pool
+from rows import converter_for
+from user_query import USER_COLUMNS, USER_SELECT
+
 
 def connect_db():
     """Connects to the MySQL server."""
@@ -30,15 +38,9 @@ def create_database(connection):
 
 
 def connect_to_prodev():
-    """Connects to the ALX_prodev database."""
+    """Leases a connection to the ALX_prodev database from the shared pool."""
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="ALX_prodev"
-        )
-        return connection
+        return db_pool.get_connection()
     except mysql.connector.Error as err:
         print(f"Error: {err}")
         return None
@@ -54,9 +56,15 @@ def create_table(connection):
                 name VARCHAR(255) NOT NULL,
                 email VARCHAR(255) NOT NULL,
                 age DECIMAL NOT NULL,
-                INDEX (user_id)
+                updated_at TIMESTAMP(6) NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP(6)
+                    ON UPDATE CURRENT_TIMESTAMP(6),
+                INDEX (user_id),
+                INDEX idx_user_data_age (age),
+                INDEX idx_user_data_updated (updated_at, user_id)
             )
         """)
+        _upgrade_table(cursor)
         connection.commit()
         cursor.close()
         print("Table user_data created successfully")
@@ -64,39 +72,245 @@ def create_table(connection):
         print(f"Table creation error: {err}")
 
 
+def _schema_has(cursor, table, name):
+    """Checks information_schema for a user_data column or index."""
+    column = "column_name" if table == "columns" else "index_name"
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM information_schema.{table}
+        WHERE table_schema = DATABASE() AND table_name = 'user_data'
+        AND {column} = %s
+    """, (name,))
+    (count,) = cursor.fetchone()
+    return count > 0
+
+
+def _upgrade_table(cursor):
+    """Adds columns and indexes missing from user_data tables created earlier."""
+    if not _schema_has(cursor, "columns", "updated_at"):
+        cursor.execute("""
+            ALTER TABLE user_data ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        """)
+    if not _schema_has(cursor, "statistics", "idx_user_data_age"):
+        cursor.execute("CREATE INDEX idx_user_data_age ON user_data (age)")
+    if not _schema_has(cursor, "statistics", "idx_user_data_updated"):
+        cursor.execute(
+            "CREATE INDEX idx_user_data_updated ON user_data (updated_at, user_id)"
+        )
+
+
 def insert_data(connection, csv_file):
     """Inserts data from a CSV file into the user_data table."""
     try:
-        cursor = connection.cursor()
+        bulk_insert_data(connection, csv_file)
+        print("Data inserted successfully")
+    except Exception as e:
+        print(f"Data insertion error: {e}")
+
+
+def _read_chunks(reader, chunk_size):
+    """Generator that groups CSV rows into user_data parameter tuples."""
+    chunk = []
+    for row in reader:
+        chunk.append((
+            row.get("user_id") or str(uuid.uuid4()),
+            row["name"],
+            row["email"],
+            Decimal(row["age"]),
+        ))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_signature(csv_file):
+    """Identifies a CSV file by path, size and modification time."""
+    stat = os.stat(csv_file)
+    return {"csv": os.path.abspath(csv_file), "size": stat.st_size,
+            "mtime": stat.st_mtime}
+
+
+def _read_checkpoint(checkpoint_file, csv_file):
+    """Returns the rows a previous failed run committed from this same CSV."""
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return 0
+    try:
+        with open(checkpoint_file) as file:
+            checkpoint = json.load(file)
+    except ValueError:
+        return 0
+    if not isinstance(checkpoint, dict) or \
+            checkpoint.get("signature") != _csv_signature(csv_file):
+        return 0
+    return checkpoint.get("rows", 0)
+
+
+def _write_checkpoint(checkpoint_file, csv_file, rows_done):
+    """Records the number of committed rows so a failed load can resume."""
+    if not checkpoint_file:
+        return
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, "w") as file:
+        json.dump({"signature": _csv_signature(csv_file), "rows": rows_done},
+                  file)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def _clear_checkpoint(checkpoint_file):
+    """Removes the checkpoint once the whole file has been loaded."""
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+
+def _report_progress(rows, start):
+    """Prints the rows committed so far and the load rate."""
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed else 0
+    print(f"{rows} rows committed ({rate:,.0f} rows/sec)")
+
+
+def bulk_insert_data(connection, csv_file, chunk_size=5000,
+                     commit_every=50000, checkpoint_file=None,
+                     report_progress=True):
+    """Streams a CSV file into user_data in chunks of multi-row INSERTs.
+
+    Rows are sent chunk_size at a time through executemany, which the
+    connector rewrites into a single multi-row VALUES statement, and
+    committed every commit_every rows. When checkpoint_file is given the
+    committed row count is stored there, so rerunning on the same,
+    unchanged CSV after a failure skips rows that already made it in.
+    The checkpoint is removed once the load completes. On error the
+    uncommitted chunks are rolled back. Returns the rows inserted, not
+    counting rows INSERT IGNORE skipped.
+    """
+    rows_done = _read_checkpoint(checkpoint_file, csv_file)
+    rows_pending = 0
+    inserted_pending = 0
+    inserted = 0
+    start = time.perf_counter()
+    cursor = connection.cursor()
+    try:
         with open(csv_file, newline='') as file:
             reader = csv.DictReader(file)
-            for row in reader:
-                user_id = row.get("user_id") or str(uuid.uuid4())
-                name = row["name"]
-                email = row["email"]
-                age = Decimal(row["age"])
-                cursor.execute("""
+            for _ in itertools.islice(reader, rows_done):
+                pass
+
+            for chunk in _read_chunks(reader, chunk_size):
+                cursor.executemany("""
                     INSERT IGNORE INTO user_data (user_id, name, email, age)
                     VALUES (%s, %s, %s, %s)
-                """, (user_id, name, email, age))
+                """, chunk)
+                rows_pending += len(chunk)
+                inserted_pending += max(cursor.rowcount, 0)
+                if rows_pending >= commit_every:
+                    connection.commit()
+                    rows_done += rows_pending
+                    inserted += inserted_pending
+                    rows_pending = inserted_pending = 0
+                    _write_checkpoint(checkpoint_file, csv_file, rows_done)
+                    if report_progress:
+                        _report_progress(inserted, start)
+
         connection.commit()
+        rows_done += rows_pending
+        inserted += inserted_pending
+        _clear_checkpoint(checkpoint_file)
+        if report_progress:
+            _report_progress(inserted, start)
+    except BaseException:
+        # Left in the caller's transaction, these rows would be sent again
+        # on resume; rows without a user_id would then be duplicated
+        connection.rollback()
+        raise
+    finally:
         cursor.close()
-        print("Data inserted successfully")
-    except Exception as e:
-        print(f"Data insertion error: {e}")
+    return inserted
+
+
+def load_data_infile(connection, csv_file):
+    """Bulk loads a CSV file with LOAD DATA LOCAL INFILE.
+
+    The connection must be opened with allow_local_infile=True. Rows
+    without a user_id get a server-generated UUID. Falls back to
+    bulk_insert_data when the server refuses local infile. Raises
+    ValueError if the CSV header names anything but user_data columns.
+    """
+    with open(csv_file, newline='') as file:
+        header = [column.strip() for column in next(csv.reader(file))]
+    unknown = [column for column in header if column not in USER_COLUMNS]
+    if unknown or len(set(header)) != len(header):
+        raise ValueError(f"Unexpected CSV columns for user_data: {header}")
+    columns = ", ".join(
+        "@user_id" if column == "user_id" else column for column in header
+    )
+    if "user_id" in header:
+        user_id = "COALESCE(NULLIF(@user_id, ''), UUID())"
+    else:
+        user_id = "UUID()"
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE user_data
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            IGNORE 1 LINES
+            ({columns})
+            SET user_id = {user_id}
+        """, (os.path.abspath(csv_file),))
+        connection.commit()
+        return cursor.rowcount
+    except mysql.connector.Error as err:
+        connection.rollback()
+        print(f"LOAD DATA unavailable ({err}), using bulk inserts")
+        return bulk_insert_data(connection, csv_file)
+    finally:
+        cursor.close()
+
+
+def seed_synthetic_users(rows, chunk_size=10000):
+    """Tops user_data up to the requested number of generated users."""
+    connection = connect_db()
+    create_database(connection)
+    connection.close()
+
+    connection = connect_to_prodev()
+    create_table(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM user_data")
+    (existing,) = cursor.fetchone()
+
+    missing = rows - existing
+    while missing > 0:
+        chunk = [
+            (str(uuid.uuid4()), f"user{i}", f"user{i}@example.com", 18 + i % 60)
+            for i in range(min(chunk_size, missing))
+        ]
+        cursor.executemany("""
+            INSERT IGNORE INTO user_data (user_id, name, email, age)
+            VALUES (%s, %s, %s, %s)
+        """, chunk)
+        connection.commit()
+        missing -= len(chunk)
+
+    cursor.close()
+    connection.close()
 
 
-def stream_user_data(connection):
+def stream_user_data(connection, row_factory=None):
     """Generator that yields rows from user_data table one at a time."""
     try:
         cursor = connection.cursor(buffered=False)
-        cursor.execute("SELECT * FROM user_data")
+        cursor.execute(f"SELECT {USER_SELECT} FROM user_data")
+        convert = row_factory and converter_for(cursor, row_factory)
 
         while True:
             row = cursor.fetchone()
             if row is None:
                 break
-            yield row
+            yield convert(row) if convert else row
 
         cursor.close()
     except mysql.connector.Error as err:
@@ -0,0 +1,56 @@
+"""
+Compiles column projections and filters into SELECTs over user_data.
+
+Filters are (column, operator, value) tuples; values are always sent as
+bound parameters and column names are checked against the table schema.
+"""
+
+USER_COLUMNS = ("user_id", "name", "email", "age")
+TABLE_COLUMNS = USER_COLUMNS + ("updated_at",)
+# What the generators select; updated_at is only read by incremental.py
+USER_SELECT = ", ".join(USER_COLUMNS)
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "LIKE", "IN")
+
+
+def _check_column(column):
+    """Rejects anything that is not a user_data column."""
+    if column not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown user_data column: {column}")
+    return column
+
+
+def compile_filters(filters):
+    """Returns the WHERE clause and its parameters for a list of filters."""
+    clauses = []
+    params = []
+    for column, operator, value in filters or ():
+        operator = operator.upper()
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+        _check_column(column)
+        if operator == "IN":
+            value = list(value)
+            if not value:
+                # "col IN ()" is a syntax error; an empty set matches nothing
+                clauses.append("1 = 0")
+                continue
+            placeholders = ", ".join(["%s"] * len(value))
+            clauses.append(f"{column} IN ({placeholders})")
+            params.extend(value)
+        else:
+            clauses.append(f"{column} {operator} %s")
+            params.append(value)
+    if not clauses:
+        return "", ()
+    return " WHERE " + " AND ".join(clauses), tuple(params)
+
+
+def compile_select(columns=None, filters=None, order_by=None):
+    """Returns (sql, params) selecting columns from user_data."""
+    projection = ", ".join(_check_column(c) for c in columns) if columns \
+        else USER_SELECT
+    where, params = compile_filters(filters)
+    sql = f"SELECT {projection} FROM user_data{where}"
+    if order_by:
+        sql += f" ORDER BY {_check_column(order_by)}"
+    return sql, params